@@ -1,6 +1,8 @@
 import streamlit as st
 
+from utils import instrument
 
+instrument.start_page("Главная")
 st.set_page_config(page_title="Streamlit Demo", layout="wide")
 
 
@@ -65,6 +67,7 @@ with cols[1]:
     st.page_link("pages/6 Работа с таблицами.py", label="Работа с таблицами")
     st.page_link("pages/7 Работа с научной графикой.py", label="Научная графика")
     st.page_link("pages/8 Работа с scipy.py", label="Работа с SciPy")
+    st.page_link("pages/10 Диагностика.py", label="Диагностика")
 
 
 st.divider()
@@ -72,3 +75,5 @@ st.caption("Разработано в полном восхищении от Str
 
 st.success("Можно делать такие штуки, как сообщения об успехе.")
 st.info("Реализовано информационное сообщение. Пусть тут будет упоминание работы с сайд-баром.")
+
+instrument.end_page()
@@ -0,0 +1 @@
+"""Бенчмарки производительности. Запуск из корня проекта: python -m benchmarks.<имя>"""
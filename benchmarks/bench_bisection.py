@@ -0,0 +1,117 @@
+"""Сравнение построчного и векторного метода бисекций из задания 4.1.
+
+Запуск: python -m benchmarks.bench_bisection [--steps 0.1 0.01 1e-3 1e-4 1e-5]
+"""
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from utils.bisection import bisection_many, find_sign_changes
+
+
+def f_scalar(x):
+    return (1 + x**2) * math.exp(-x) + math.sin(x)
+
+
+def f_vector(x):
+    return (1 + x**2) * np.exp(-x) + np.sin(x)
+
+
+def bisection(f, a, b, eps=1e-8, max_iter=1000):
+    """Прежняя построчная версия с логом итераций"""
+    if f(a) * f(b) > 0:
+        return None, []
+    steps = []
+    for i in range(max_iter):
+        c = (a + b) / 2
+        fc = f(c)
+        steps.append((i + 1, a, b, c, fc))
+        if abs(fc) < eps or (b - a) < eps:
+            return c, steps
+        if f(a) * fc < 0:
+            b = c
+        else:
+            a = c
+    return (a + b) / 2, steps
+
+
+def find_sign_changes_loop(f, start, end, step=0.1):
+    """Прежний поиск интервалов циклом while с накоплением x += step"""
+    intervals = []
+    x_prev = start
+    f_prev = f(x_prev)
+    x = x_prev + step
+    while x <= end:
+        f_current = f(x)
+        if f_prev * f_current <= 0:
+            intervals.append((x_prev, x))
+        x_prev = x
+        f_prev = f_current
+        x += step
+    return intervals
+
+
+def run_loop(step, eps):
+    intervals = find_sign_changes_loop(f_scalar, 0, 10, step)
+    return intervals, [bisection(f_scalar, a, b, eps) for a, b in intervals]
+
+
+def run_vector(step, eps):
+    intervals = find_sign_changes(f_vector, 0, 10, step)
+    return intervals, bisection_many(f_vector, intervals[:, 0], intervals[:, 1], eps)
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=float, nargs="+", default=[0.1, 0.01, 1e-3, 1e-4, 1e-5])
+    parser.add_argument("--eps", type=float, default=1e-8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'шаг':>8} {'интервалов':>11} {'цикл, мс':>10} {'векторно, мс':>13} {'ускорение':>10} {'итерации совпали':>17}")
+    for step in args.steps:
+        t_loop, (loop_intervals, loop_results) = best_of(lambda: run_loop(step, args.eps), args.repeat)
+        t_vec, (vec_intervals, (roots, iterations, _)) = best_of(lambda: run_vector(step, args.eps), args.repeat)
+
+        # Накопление x += step в цикле сдвигает узлы сетки, поэтому интервалы
+        # сопоставляются по ближайшему левому концу в пределах полушага.
+        # Каждому векторному интервалу должна найтись пара из цикла
+        loop_a = np.array([a for a, _ in loop_intervals])
+        loop_iterations = np.array([len(steps) for _, steps in loop_results])
+        unpaired, differ = 0, 0
+        for a, n in zip(vec_intervals[:, 0], iterations):
+            if len(loop_a) == 0:
+                unpaired += 1
+                continue
+            j = int(np.argmin(np.abs(loop_a - a)))
+            if abs(loop_a[j] - a) >= step / 2:
+                unpaired += 1
+            elif loop_iterations[j] != n:
+                differ += 1
+        same = unpaired == 0 and differ == 0
+        failures += not same
+        print(
+            f"{step:>8g} {len(vec_intervals):>11} {t_loop * 1e3:>10.2f} {t_vec * 1e3:>13.2f} "
+            f"{t_loop / t_vec:>9.1f}x {'да' if same else 'нет':>17}"
+            + (f"  без пары: {unpaired}, итерации разошлись: {differ}" if not same else "")
+        )
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
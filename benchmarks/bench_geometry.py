@@ -0,0 +1,66 @@
+"""Сравнение построчного и векторного разбора колонки geo_shape.
+
+Запуск: python -m benchmarks.bench_geometry [--sizes 1000 100000 1000000]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from shapely.geometry import shape
+
+from utils.routes import decode_geometries
+
+
+def parse_geometry(geo_str):
+    """Прежний построчный разбор: json.loads + shape на каждую строку"""
+    try:
+        geojson = json.loads(geo_str)
+        return shape(geojson)
+    except Exception:
+        return None
+
+
+def make_geo_shapes(n, vertices=32, bad_share=0.001, seed=0):
+    """Синтетическая колонка geo_shape: n многоугольников по vertices вершин"""
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    unit = np.column_stack([np.cos(angles), np.sin(angles)])
+
+    # Несколько шаблонов, чтобы не тратить время генерации на миллион json.dumps
+    templates = []
+    for _ in range(64):
+        center = rng.uniform([-81.0, 41.0], [-80.0, 42.0])
+        ring = center + unit * rng.uniform(0.005, 0.02)
+        ring = np.vstack([ring, ring[:1]]).round(6).tolist()
+        templates.append(json.dumps({"type": "Polygon", "coordinates": [ring]}))
+
+    values = np.array(templates, dtype=object)[rng.integers(0, len(templates), n)]
+    bad = rng.random(n) < bad_share
+    values[bad] = '{"type": "Polygon", "coordinates": [[[0, 0], [1'
+    return pd.Series(values)
+
+
+def measure(func, column):
+    start = time.perf_counter()
+    func(column)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--vertices", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'строк':>10} {'построчно, строк/с':>20} {'векторно, строк/с':>20} {'ускорение':>10}")
+    for n in args.sizes:
+        column = make_geo_shapes(n, args.vertices)
+        per_row = measure(lambda c: c.apply(parse_geometry), column)
+        bulk = measure(decode_geometries, column)
+        print(f"{n:>10} {n / per_row:>20,.0f} {n / bulk:>20,.0f} {per_row / bulk:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
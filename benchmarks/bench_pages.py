@@ -0,0 +1,282 @@
+"""Время прогонов и память страниц приложения без браузера (streamlit.testing).
+
+Каждая страница запускается в отдельном процессе, чтобы кэши Streamlit и
+импорты не переносились между страницами. Замеряются первый (холодный)
+прогон, повторные прогоны без изменений, прогоны после типичных действий
+пользователя и пиковая память процесса.
+
+Запуск:
+    python -m benchmarks.bench_pages run [--pages "pages/4 4.1.py" ...] [--repeat 5] [--output bench_pages.json]
+    python -m benchmarks.bench_pages compare old.json new.json [--threshold 0.2]
+
+compare считает регрессией рост метрики больше порога, а также страницу,
+которой нет в новом прогоне, новое исключение и действие, для которого
+не нашёлся виджет.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = "app.py"
+
+# Действия пользователя: (тип виджета, подпись, значения). Значения — список
+# или функция виджета, возвращающая список; для кнопок значение None — нажатие
+SCENARIOS = {
+    "pages/1 Работа с текстом.py": [
+        ("text_input", "Введите ваше имя:", ["Аспирант", "Студент"]),
+    ],
+    "pages/2 Элементы графического интерфейса.py": [
+        ("slider", "Выберите значение:", [10, 90]),
+    ],
+    "pages/4 4.1.py": [
+        ("radio", "Выберите раздел:", ["Решение без scipy"]),
+        ("slider", "Шаг для поиска интервалов:", [0.05, 0.2]),
+    ],
+    "pages/5 4.2.py": [
+        ("radio", "Выберите раздел:", ["Решение без SciPy"]),
+        ("slider", "Введите размерность системы (n):", [8, 16]),
+        ("button", "Решить", [None]),
+    ],
+    "pages/6 Работа с таблицами.py": [
+        ("slider", "Показать только строки с температурой выше:", [25, 30]),
+        ("selectbox", "Условие:", ["<", ">"]),
+    ],
+    "pages/7 Работа с научной графикой.py": [
+        ("number_input", "Зерно генератора шума:", [1, 2]),
+        ("number_input", "Число отсчётов:", [100_000]),
+        ("button", "Сгенерировать сигнал", [None]),
+        ("slider", "Порядок фильтра:", [6, 4]),
+    ],
+    "pages/8 Работа с scipy.py": [
+        ("number_input", "Значений p:", [1000, 5000]),
+        ("number_input", "Число узлов:", [100_000]),
+        ("button", "Сгенерировать узлы", [None]),
+    ],
+    "pages/9 Другое.py": [
+        ("selectbox", "Выберите день недели:", lambda widget: list(widget.options[1:3])),
+    ],
+}
+
+# Меньший рост не считается регрессией даже при большой относительной разнице (с и МБ)
+TIME_FLOOR = 0.005
+MEMORY_FLOOR = 5.0
+
+
+def page_scripts():
+    pages = sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")),
+                   key=lambda p: int(os.path.basename(p).split()[0]))
+    return [APP] + [os.path.relpath(p, ROOT) for p in pages]
+
+
+def peak_rss_mb():
+    # ru_maxrss в Linux — в килобайтах, в macOS — в байтах
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    return time.perf_counter() - start
+
+
+def find_widget(at, kind, label):
+    for widget in getattr(at, kind):
+        if widget.label == label:
+            return widget
+    return None
+
+
+def measure_page(script, repeat):
+    """Замеры одной страницы в текущем процессе; возвращает словарь результатов"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, APP), default_timeout=600)
+    if script == APP:
+        rss_before = peak_rss_mb()
+        cold = timed_run(at)
+    else:
+        # Главная открывается без замера: страницы доступны только через неё
+        at.run()
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        at.switch_page(script).run()
+        cold = time.perf_counter() - start
+
+    warm = [timed_run(at) for _ in range(repeat)]
+
+    interactions, skipped = {}, []
+    for kind, label, values in SCENARIOS.get(script, []):
+        widget = find_widget(at, kind, label)
+        if widget is None:
+            skipped.append(label)
+            continue
+        if callable(values):
+            values = values(widget)
+        times = []
+        for value in values:
+            widget = find_widget(at, kind, label)
+            if widget is None:
+                break
+            if kind == "button":
+                widget.click()
+            else:
+                widget.set_value(value)
+            times.append(timed_run(at))
+        if times:
+            interactions[label] = statistics.median(times)
+        else:
+            skipped.append(label)
+
+    return {
+        "cold_s": cold,
+        "warm_s": statistics.median(warm),
+        "warm_min_s": min(warm),
+        "interactions_s": interactions,
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_before_mb": rss_before,
+        "skipped": skipped,
+        "exceptions": [str(e.value) for e in at.exception],
+    }
+
+
+def run(args):
+    from streamlit import __version__
+
+    scripts = args.pages or page_scripts()
+    results = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "streamlit": __version__,
+        "repeat": args.repeat,
+        "pages": {},
+    }
+    for script in scripts:
+        # Отдельный процесс и пустой временный каталог на страницу: холодный прогон
+        # действительно холодный, а созданные прошлыми прогонами файлы не влияют на сценарий
+        with tempfile.TemporaryDirectory(prefix="bench_pages_") as tmp:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_pages", "_page", script, "--repeat", str(args.repeat)],
+                cwd=ROOT, capture_output=True, text=True, env={**os.environ, "TMPDIR": tmp},
+            )
+        if proc.returncode != 0:
+            print(f"{script}: ошибка\n{proc.stderr[-2000:]}", file=sys.stderr)
+            results["pages"][script] = {"error": proc.stderr[-2000:]}
+            continue
+        page = json.loads(proc.stdout.strip().splitlines()[-1])
+        results["pages"][script] = page
+        print(
+            f"{script:<48} холодный {page['cold_s']:7.3f} с  повторный {page['warm_s']:7.3f} с  "
+            f"пик {page['peak_rss_mb']:7.1f} МБ"
+            + (f"  исключений: {len(page['exceptions'])}" if page["exceptions"] else "")
+            + (f"  пропущено: {', '.join(page['skipped'])}" if page["skipped"] else "")
+        )
+        for label, seconds in page["interactions_s"].items():
+            print(f"{'':<48}   {label} {seconds:7.3f} с")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+
+
+def metrics(page):
+    """Сравниваемые величины страницы: имя -> (значение, минимальная разница)"""
+    out = {
+        "холодный прогон, с": (page["cold_s"], TIME_FLOOR),
+        "повторный прогон, с": (page["warm_s"], TIME_FLOOR),
+        "пиковая память, МБ": (page["peak_rss_mb"], MEMORY_FLOOR),
+    }
+    for label, seconds in page["interactions_s"].items():
+        out[f"{label}, с"] = (seconds, TIME_FLOOR)
+    return out
+
+
+def compare(args):
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)["pages"]
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)["pages"]
+
+    regressions = 0
+
+    def flag(script, message):
+        nonlocal regressions
+        regressions += 1
+        print(f"{script:<48} {message} РЕГРЕССИЯ")
+
+    # Страница, которая пропала из прогона, упала или стала бросать исключения,
+    # выглядела бы быстрее — такие изменения тоже считаются регрессией
+    for script in old:
+        if script not in new:
+            flag(script, "нет в новом прогоне")
+    for script in new:
+        if script not in old or "error" in old[script]:
+            continue
+        if "error" in new[script]:
+            flag(script, "процесс замера завершился с ошибкой")
+            continue
+        for message in sorted(set(new[script]["exceptions"]) - set(old[script]["exceptions"])):
+            flag(script, f"новое исключение: {message[:200]}")
+        for label in sorted(set(new[script]["skipped"]) - set(old[script]["skipped"])):
+            flag(script, f"действие не выполнено, виджет не найден: {label}")
+
+        before, after = metrics(old[script]), metrics(new[script])
+        for name, (value, floor) in after.items():
+            if name not in before:
+                continue
+            base = before[name][0]
+            change = (value - base) / base if base > 0 else 0.0
+            regressed = change > args.threshold and value - base > floor
+            regressions += regressed
+            if regressed or args.verbose:
+                mark = "РЕГРЕССИЯ" if regressed else ""
+                print(f"{script:<48} {name:<45} {base:9.3f} -> {value:9.3f} ({change:+.0%}) {mark}")
+
+    if regressions:
+        print(f"Регрессий: {regressions} (порог роста {args.threshold:.0%})")
+        sys.exit(1)
+    print(f"Регрессий нет (порог роста {args.threshold:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="замерить страницы и записать JSON")
+    run_parser.add_argument("--pages", nargs="+", help="скрипты относительно корня проекта (по умолчанию все)")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", default="bench_pages.json")
+
+    compare_parser = commands.add_parser("compare", help="сравнить два JSON и найти регрессии")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="допустимый относительный рост")
+    compare_parser.add_argument("--verbose", action="store_true", help="печатать все метрики, а не только регрессии")
+
+    # Внутренняя команда: замер одной страницы в дочернем процессе
+    page_parser = commands.add_parser("_page")
+    page_parser.add_argument("script")
+    page_parser.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "compare":
+        compare(args)
+    else:
+        print(json.dumps(measure_page(args.script, args.repeat), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import streamlit as st
 
+from utils import instrument
+
+instrument.start_page("Работа с текстом")
 st.page_link("./app.py", label="Вернуться на главную")
 
 st.title("📝 Работа с текстом")
@@ -23,3 +26,5 @@ st.code("""
 # Пример форматирования
 user_name = st.text_input("Введите ваше имя:", "Студент")
 """, language="python")
+
+instrument.end_page()
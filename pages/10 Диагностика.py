@@ -0,0 +1,75 @@
+import streamlit as st
+import os
+import pandas as pd
+
+from utils import instrument
+
+instrument.start_page("Диагностика")
+st.page_link("./app.py", label="Вернуться на главную")
+st.title("Диагностика производительности")
+
+st.markdown(f"""
+Страницы замеряют время своих этапов: чтение данных, итерации решателей,
+отрисовку графиков, подготовку данных для браузера. Для каждой пары
+«страница — этап» хранятся последние {instrument.WINDOW} замеров на процесс сервера.
+Кэшируемые этапы замеряются только при промахе кэша.
+""")
+
+st.subheader("Время этапов")
+latency = pd.DataFrame(instrument.latency_rows())
+if latency.empty:
+    st.info("Замеров пока нет: откройте другие страницы приложения.")
+else:
+    page_filter = st.multiselect("Страницы:", sorted(latency["Страница"].unique()))
+    if page_filter:
+        latency = latency[latency["Страница"].isin(page_filter)]
+    st.dataframe(latency.style.format(precision=1), hide_index=True)
+if st.button("Сбросить замеры"):
+    instrument.reset()
+    st.rerun()
+
+st.subheader("Кэши")
+caches = pd.DataFrame(instrument.cache_rows())
+if caches.empty:
+    st.info("Ни один кэш ещё не создан.")
+else:
+    st.dataframe(caches.style.format({"Доля попаданий": "{:.1%}"}, na_rep="—"), hide_index=True)
+
+st.subheader("Профиль одного прогона")
+st.markdown("""
+Выбранная страница выполняется один раз под `cProfile` с настройками виджетов
+по умолчанию; её вывод показывается ниже в прокручиваемом блоке. Таблица отсортирована
+по общему времени функции вместе с вызываемыми ею.
+""")
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(APP_DIR, "pages")
+scripts = {"Главная": os.path.join(APP_DIR, "app.py")}
+for name in sorted(os.listdir(PAGES_DIR), key=lambda s: int(s.split()[0]) if s.split()[0].isdigit() else 0):
+    path = os.path.join(PAGES_DIR, name)
+    if name.endswith(".py") and path != os.path.abspath(__file__):
+        scripts[name[:-3]] = path
+
+col_script, col_limit = st.columns([3, 1])
+with col_script:
+    script = st.selectbox("Страница:", list(scripts))
+with col_limit:
+    limit = st.number_input("Строк:", 10, 200, 40, step=10)
+
+if st.button("Снять профиль"):
+    # Не expander: страницы сами используют expander, а вложенные запрещены
+    with st.container(height=400, border=True):
+        try:
+            rows = instrument.profile_script(scripts[script], int(limit))
+        except Exception as e:
+            rows = None
+            st.error(f"Страница «{script}» завершилась с ошибкой: {type(e).__name__}: {e}")
+    if rows is not None:
+        st.session_state["profile_rows"] = (script, rows)
+
+if "profile_rows" in st.session_state:
+    script_name, rows = st.session_state["profile_rows"]
+    st.caption(f"Профиль страницы «{script_name}»")
+    st.dataframe(pd.DataFrame(rows).style.format(precision=4), hide_index=True)
+
+instrument.end_page()
@@ -1,4 +1,7 @@
 import streamlit as st
+
+from utils import instrument
+instrument.start_page("Элементы интерфейса")
 st.page_link("./app.py", label="Вернуться на главную")
 st.title("Элементы графического интерфейса")
 
@@ -25,3 +28,5 @@ st.write(f"Ваш выбор: {option}")
 feedback = st.text_area("Оставьте отзыв:")
 if feedback:
     st.write("Ваш отзыв принят:", feedback)
+
+instrument.end_page()
@@ -1,4 +1,8 @@
 import streamlit as st
+
+from utils import decimate, instrument
+
+instrument.start_page("Компоновка страницы")
 st.page_link("./app.py", label="Вернуться на главную")
 st.title("Компоновка страницы")
 
@@ -22,8 +26,12 @@ st.subheader("Вкладки")
 tab1, tab2 = st.tabs(["График", "Таблица"])
 
 with tab1:
-    st.line_chart({"y": [1, 3, 2, 4, 3, 5]})
+    # Ряды длиннее бюджета точек прореживаются до отправки в браузер
+    chart_data, dropped = decimate.frame({"y": [1, 3, 2, 4, 3, 5]})
+    st.line_chart(chart_data)
+    if dropped:
+        st.caption(f"Отброшено точек: {dropped}")
 with tab2:
     st.table({"A": [1, 2, 3], "B": [4, 5, 6]})
 
-
+instrument.end_page()
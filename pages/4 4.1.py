@@ -1,12 +1,31 @@
 import streamlit as st
 import math
+import time
 import numpy as np
 from scipy.optimize import bisect
-import matplotlib.pyplot as plt
 
+from utils import background, figures, instrument
+from utils.bisection import bisection_many, find_sign_changes
+from utils.expressions import ExpressionError, compile_expression
+
+instrument.start_page("Задание 4.1")
 st.page_link("./app.py", label="Вернуться на главную")
 st.set_page_config(page_title="Метод бисекции", layout="centered")
 
+DEFAULT_EXPRESSION = "(1 + x^2) * exp(-x) + sin(x)"
+
+
+def equation_input():
+    """Поле для уравнения f(x) = 0. Формула компилируется один раз в векторную
+    функцию и переиспользуется поиском интервалов, решателями и графиками.
+    Ошибки разбора и пробного вычисления формулы показываются через st.error."""
+    text = st.text_input("Уравнение f(x) = 0, где f(x) =", DEFAULT_EXPRESSION, key="expression")
+    try:
+        return compile_expression(text)
+    except ExpressionError as e:
+        st.error(str(e))
+        st.stop()
+
 page = st.sidebar.radio(
     "Выберите раздел:",
     ["Аналитическое решение", "Решение без scipy", "Решение с SciPy"]
@@ -72,84 +91,103 @@ if page == "Аналитическое решение":
 
 
 elif page == "Решение без scipy":
-    import matplotlib.pyplot as plt
-
     st.title("Решение уравнения без использования SciPy")
     st.markdown("Реализация метода бисекции с автоматическим поиском интервалов смены знака и визуализацией.")
 
 
-    def f(x):
-        return (1 + x**2) * math.exp(-x) + math.sin(x)
-
-    def bisection(f, a, b, eps=1e-8, max_iter=1000):
-        """Метод бисекций с логом итераций"""
-        if f(a) * f(b) > 0:
-            return None, []
-        steps = []
-        for i in range(max_iter):
-            c = (a + b) / 2
-            fc = f(c)
-            steps.append((i + 1, a, b, c, fc))
-            if abs(fc) < eps or (b - a) < eps:
-                return c, steps
-            if f(a) * fc < 0:
-                b = c
-            else:
-                a = c
-        return (a + b) / 2, steps
-
-    def find_sign_changes(f, start, end, step=0.1):
-        """Автоматически находит интервалы смены знака функции"""
-        intervals = []
-        x_prev = start
-        f_prev = f(x_prev)
-        x = x_prev + step
-        while x <= end:
-            f_current = f(x)
-            if f_prev * f_current <= 0:
-                intervals.append((x_prev, x))
-            x_prev = x
-            f_prev = f_current
-            x += step
-        return intervals
+    LOG_PAGE_SIZE = 50
 
 
     st.header("1. Настройка параметров поиска")
+    f = equation_input()
     step = st.slider("Шаг для поиска интервалов:", 0.01, 1.0, 0.1, 0.01)
     eps = st.number_input("Точность ε:", value=1e-8, format="%.1e")
+    timeout = st.number_input("Ограничение времени решения, с:", min_value=1, max_value=600, value=30)
 
 
     st.header("2. Поиск интервалов смены знака")
     intervals = find_sign_changes(f, 0, 10, step)
 
-    if not intervals:
+    if len(intervals) == 0:
         st.error("Интервалы смены знака не найдены.")
     else:
         st.write(f"Найдено интервалов: {len(intervals)}")
+        fa, fb = f(intervals[:, 0]), f(intervals[:, 1])
         intervals_text = "\n".join(
-            [f"- Интервал {i+1}: [{a:.2f}, {b:.2f}] — f(a)={f(a):.3f}, f(b)={f(b):.3f}"
+            [f"- Интервал {i+1}: [{a:.2f}, {b:.2f}] — f(a)={fa[i]:.3f}, f(b)={fb[i]:.3f}"
              for i, (a, b) in enumerate(intervals)]
         )
         st.markdown(intervals_text)
 
 
         st.header("3. Поиск корней методом бисекции")
+        # Все интервалы уточняются одновременно в фоновом потоке; результат
+        # хранится в сессии и переиспользуется, пока не изменены уравнение, шаг и ε
+        job_key = (f.expression, step, eps)
+        current = st.session_state.get("bisection_job")
+        if current is None or current["key"] != job_key:
+            if current is not None:
+                current["job"].cancel()
+            try:
+                job = background.submit(bisection_many, f, intervals[:, 0], intervals[:, 1], eps,
+                                        log=True, timeout=timeout)
+            except background.PoolBusy as e:
+                st.error(str(e))
+                st.stop()
+            current = st.session_state["bisection_job"] = {"key": job_key, "job": job}
+        job = current["job"]
+
+        if not job.done:
+            if st.button("Отменить решение"):
+                job.cancel()
+            chart = st.empty()
+            status = st.empty()
+            while not job.done:
+                if job.norms:
+                    chart.line_chart({"lg (b - a)": np.log10(np.maximum(job.norms, 1e-300))})
+                status.caption(f"Решается… итераций: {len(job.norms)}, прошло {job.elapsed:.1f} с")
+                time.sleep(0.2)
+            chart.empty()
+            status.empty()
+
+        if job.status != "done":
+            if job.status == "error":
+                st.error(f"Ошибка при решении: {job.error}")
+            else:
+                reason = "отменено" if job.status == "cancelled" else f"остановлено по тайм-ауту ({job.timeout} с)"
+                st.warning(f"Решение {reason} после {len(job.norms)} итераций.")
+            if st.button("Запустить заново"):
+                del st.session_state["bisection_job"]
+                st.rerun()
+            st.stop()
+        all_roots, _, history = job.result
         roots = []
-        for a, b in intervals:
-            root, steps = bisection(f, a, b, eps)
-            if root is not None:
-                roots.append((root, steps))
+        for k, ((a, b), root) in enumerate(zip(intervals, all_roots)):
+            if not np.isnan(root):
+                roots.append((root, k))
                 st.success(f"Корень ≈ {root:.4f}, f(x) = {f(root):.2e}")
 
-                st.expander(f"Показать ход вычислений для [{a:.2f}, {b:.2f}]").dataframe(
-                    {
-                        "Итерация": [s[0] for s in steps],
-                        "a": [round(s[1], 6) for s in steps],
-                        "b": [round(s[2], 6) for s in steps],
-                        "c": [round(s[3], 6) for s in steps],
-                        "f(c)": [round(s[4], 8) for s in steps],
-                    }
-                )
+                # Лог форматируется и отправляется в браузер только по запросу,
+                # длинные прогоны (до max_iter строк) показываются постранично
+                if st.toggle(f"Показать ход вычислений для [{a:.2f}, {b:.2f}]", key=f"log_{a:.6f}_{b:.6f}"):
+                    total = int(history.lengths[k])
+                    pages = (total - 1) // LOG_PAGE_SIZE + 1
+                    page_no = 1
+                    if pages > 1:
+                        page_no = st.number_input(
+                            f"Страница (из {pages}):", 1, pages, 1, key=f"log_page_{a:.6f}_{b:.6f}"
+                        )
+                    start = (page_no - 1) * LOG_PAGE_SIZE
+                    rows = history.bracket(k, start, start + LOG_PAGE_SIZE)
+                    st.dataframe(
+                        {
+                            "Итерация": rows["iteration"],
+                            "a": rows["a"].round(6),
+                            "b": rows["b"].round(6),
+                            "c": rows["c"].round(6),
+                            "f(c)": rows["fc"].round(8),
+                        }
+                    )
 
         if roots:
             st.markdown("**Найденные корни:** " + ", ".join([f"{r[0]:.6f}" for r in roots]))
@@ -157,19 +195,23 @@ elif page == "Решение без scipy":
 
             st.header("4. Визуализация")
             x_vals = np.linspace(0, 10, 1000)
-            y_vals = [(1 + x**2) * np.exp(-x) + np.sin(x) for x in x_vals]
-
-            fig, ax = plt.subplots(figsize=(8, 4))
-            ax.plot(x_vals, y_vals, label="f(x)")
-            ax.axhline(0, color="black", linestyle="--", linewidth=1)
-            for r, _ in roots:
-                ax.plot(r, f(r), "ro", label=f"x ≈ {r:.3f}")
-            ax.set_title("График функции и найденные корни")
-            ax.set_xlabel("x")
-            ax.set_ylabel("f(x)")
-            ax.legend()
-            ax.grid(True)
-            st.pyplot(fig)
+            y_vals = f(x_vals)
+            root_vals = np.array([r for r, _ in roots])
+
+            def draw(ax):
+                ax.plot(x_vals, y_vals, label="f(x)")
+                ax.axhline(0, color="black", linestyle="--", linewidth=1)
+                for r, fr in zip(root_vals, f(root_vals)):
+                    ax.plot(r, fr, "ro", label=f"x ≈ {r:.3f}")
+                ax.set_title("График функции и найденные корни")
+                ax.set_xlabel("x")
+                ax.set_ylabel("f(x)")
+                ax.legend()
+                ax.grid(True)
+
+            # Рисунок зависит только от уравнения и найденных корней
+            image = figures.render(("4.1", f.expression, figures.array_key(root_vals)), draw, figsize=(8, 4))
+            st.image(image, use_container_width=True)
         else:
             st.warning("Корни не найдены на выбранном интервале.")
 
@@ -183,44 +225,44 @@ elif page == "Решение с SciPy":
     которая реализует тот же метод бисекций, но с оптимизацией и проверками.
     """)
 
-    def f(x):
-        return (1 + x**2) * np.exp(-x) + np.sin(x)
-
+    f = equation_input()
 
+    # Значения на сетке считаются одним вызовом и используются и для поиска
+    # интервалов смены знака, и для графика
     x_values = np.linspace(0, 10, 1000)
+    y_values = f(x_values)
     roots = []
 
-    for i in range(len(x_values) - 1):
-        a, b = x_values[i], x_values[i + 1]
-        if f(a) * f(b) < 0:
-            root = bisect(f, a, b)
-            if not roots or abs(root - roots[-1]) > 1e-4:
-                roots.append(root)
+    for i in np.flatnonzero(y_values[:-1] * y_values[1:] < 0):
+        root = bisect(f, x_values[i], x_values[i + 1])
+        if not roots or abs(root - roots[-1]) > 1e-4:
+            roots.append(root)
+    roots = np.array(roots)
 
 
-    if roots:
+    if len(roots):
         st.success(f"Найдено корней: {len(roots)}")
-        for r in roots:
-            st.write(f"x = {r:.6f}, f(x) = {f(r):.2e}")
+        for r, fr in zip(roots, f(roots)):
+            st.write(f"x = {r:.6f}, f(x) = {fr:.2e}")
     else:
         st.error("Корни на интервале [0, 10] не найдены.")
 
 
     st.header("График функции f(x) и найденные корни")
 
-    y_values = f(x_values)
+    def draw(ax):
+        ax.plot(x_values, y_values, label=f"f(x) = {f.expression}", linewidth=2)
+        ax.axhline(0, color='black', linewidth=1, linestyle='--')
 
-    fig, ax = plt.subplots(figsize=(8, 4))
-    ax.plot(x_values, y_values, label=r"$f(x) = (1+x^2)e^{-x} + \sin(x)$", linewidth=2)
-    ax.axhline(0, color='black', linewidth=1, linestyle='--')
+        if len(roots):
+            ax.scatter(roots, f(roots), color='red', s=60, label="Найденные корни")
 
-    if roots:
-        ax.scatter(roots, [f(r) for r in roots], color='red', s=60, label="Найденные корни")
+        ax.set_xlabel("x")
+        ax.set_ylabel("f(x)")
+        ax.set_title("График функции и найденные корни (SciPy)")
+        ax.legend()
+        ax.grid(True)
 
-    ax.set_xlabel("x")
-    ax.set_ylabel("f(x)")
-    ax.set_title("График функции и найденные корни (SciPy)")
-    ax.legend()
-    ax.grid(True)
+    st.image(figures.render(("4.1 SciPy", f.expression), draw, figsize=(8, 4)), use_container_width=True)
 
-    st.pyplot(fig)
+instrument.end_page()
@@ -1,14 +1,40 @@
 import streamlit as st
+import time
 import numpy as np
+import pandas as pd
 from scipy.optimize import bisect, root
-import matplotlib.pyplot as plt
+
+from utils import background, convergence_study, figures, instrument, newton, root_benchmark
+from utils.solve_cache import SolveCache, continue_guess
+from utils.jacobian import SparseJacobian, banded_pattern, detect_sparsity
+instrument.start_page("Задание 4.2")
 st.page_link("./app.py", label="Вернуться на главную")
 st.set_page_config(page_title="Метод Ньютона", layout="centered")
 
 
+# Общий для всех сессий кэш решений системы 4.2
+@st.cache_resource
+def get_solve_cache():
+    cache = SolveCache(max_entries=64, max_bytes=256 * 1024 * 1024)
+    instrument.register_cache("Решения системы 4.2", cache.stats)
+    return cache
+
+
+# Шаблон и раскраска не зависят от сессии; счётчики у каждого решения свои (fresh)
+@st.cache_resource(max_entries=4, show_spinner="Подготовка шаблона матрицы Якоби...")
+def get_sparse_jacobian(n, source):
+    if source.startswith("Задан"):
+        pattern = banded_pattern(n)
+    else:
+        # Определение шаблона стоит n вычислений F — делается один раз в случайной точке
+        pattern = detect_sparsity(newton.residual, np.random.default_rng(0).uniform(0.5, 1.5, n))
+    return SparseJacobian(pattern)
+
+
 page = st.sidebar.radio(
     "Выберите раздел:",
-    ["Аналитическое решение", "Решение без SciPy", "Решение с SciPy (одномерное)", "Решение с SciPy (система)"]
+    ["Аналитическое решение", "Решение без SciPy", "Исследование сходимости", "Решение с SciPy (одномерное)",
+     "Решение с SciPy (система)"]
 )
 
 
@@ -49,65 +75,269 @@ if page == "Аналитическое решение":
 elif page == "Решение без SciPy":
     st.title("Решение системы методом Ньютона")
 
-    def f(x):
-        n = len(x)
-        F = np.zeros(n)
-        F[0] = (3 + 2 * x[0]) * x[0] - 2 * x[1] - 3
-        for i in range(1, n - 1):
-            F[i] = (3 + 2 * x[i]) * x[i] - x[i - 1] - 2 * x[i + 1] - 2
-        F[n - 1] = (3 + 2 * x[n - 1]) * x[n - 1] - x[n - 2] - 4
-        return F
-
-    def Jacobi_matrix(x, h=1e-8):
-        n = len(x)
-        J = np.zeros((n, n))
-        F_x = f(x)
-        for i in range(n):
-            x_h = x.copy()
-            x_h[i] += h
-            F_x_h = f(x_h)
-            J[:, i] = (F_x_h - F_x) / h
-        return J
-
-    def Newton_method(x, eps, k):
-        norms = []
-        for i in range(k):
-            F = f(x)
-            norms.append(np.linalg.norm(F))
-            if np.linalg.norm(F) < eps:
-                return x, i + 1, norms
-            J = Jacobi_matrix(x)
-            try:
-                dx = np.linalg.solve(J, -F)
-            except np.linalg.LinAlgError:
-                return None, i, norms
-            x += dx
-            if np.linalg.norm(dx) < eps:
-                return x, i + 1, norms
-        return None, k, norms
-
-    n = st.number_input("Введите размерность системы (n):", min_value=2, max_value=20, value=4, step=1)
-    n = st.slider("Введите размерность системы (n):", 2, 20, 4)
+    mode = st.radio(
+        "Способ решения:",
+        ["Плотная матрица Якоби", "Ленточная матрица Якоби (большие n)", "Разреженная матрица Якоби (раскраска столбцов)",
+         "Повторное использование матрицы Якоби (хорд / Бройден)"],
+        horizontal=True,
+    )
+    jacobian = None
+
+    if mode == "Плотная матрица Якоби":
+        # Плотная матрица и решение за O(n³) — только для маленьких систем
+        f, Newton_method = newton.residual_loop, newton.newton_dense
+        n = st.slider("Введите размерность системы (n):", 2, 20, 4)
+        method_key = (mode,)
+    elif mode == "Ленточная матрица Якоби (большие n)":
+        f, Newton_method = newton.residual, newton.newton_banded
+        method_key = (mode,)
+        n = st.number_input("Введите размерность системы (n):", min_value=2, max_value=1_000_000, value=1000, step=1)
+        n = int(n)
+    elif mode == "Разреженная матрица Якоби (раскраска столбцов)":
+        f = newton.residual
+        n = st.number_input("Введите размерность системы (n):", min_value=2, max_value=1_000_000, value=1000, step=1)
+        n = int(n)
+        source = st.radio("Шаблон заполнения:", ["Задан (трёхдиагональный)", "Определить автоматически (n ≤ 5000)"])
+        if not source.startswith("Задан") and n > 5000:
+            st.error("Автоматическое определение шаблона доступно только для n ≤ 5000.")
+            st.stop()
+        jacobian = get_sparse_jacobian(n, source).fresh()
+        method_key = (mode, source)
+        st.caption(f"Столбцов: {n}, цветов: {jacobian.n_colors} — вычислений F на одну матрицу Якоби: {jacobian.n_colors} вместо {n}")
+
+        def Newton_method(x, eps, k, callback=None):
+            return newton.newton_sparse(x, eps, k, f, jacobian, callback)
+    else:
+        f = newton.residual
+        n = st.number_input("Введите размерность системы (n):", min_value=2, max_value=1_000_000, value=1000, step=1)
+        n = int(n)
+        strategy = st.selectbox("Стратегия:", list(newton.STRATEGIES), format_func=newton.STRATEGIES.get)
+        col_ratio, col_updates = st.columns(2)
+        with col_ratio:
+            stall_ratio = st.slider("Пересчитывать матрицу, если ‖F‖ уменьшилась меньше чем в k раз, 1/k =", 0.05, 0.95, 0.5, 0.05)
+        with col_updates:
+            max_updates = st.number_input("Обновлений Бройдена до пересчёта:", 1, 50, 5)
+        method_key = (mode, strategy, stall_ratio, int(max_updates))
+        template = get_sparse_jacobian(n, "Задан (трёхдиагональный)")
+
+        def Newton_method(x, eps, k, callback=None):
+            return newton.newton_reuse(x, eps, k, f, template.fresh(),
+                                       strategy, stall_ratio, int(max_updates), callback)
+
+    EPS = 1e-10
+    solve_cache = get_solve_cache()
+    cache_key = ("4.2", n, method_key, EPS)
+    col_cache, col_start = st.columns(2)
+    with col_cache:
+        use_cache = st.checkbox("Брать готовый результат из кэша", value=True)
+    with col_start:
+        warm_start = st.radio(
+            "Начальное приближение:",
+            ["Нули", "Из ближайшего решённого n (интерполяция)", "Из ближайшего решённого n (продолжение)"],
+        )
+    timeout = st.number_input("Ограничение времени решения, с:", min_value=1, max_value=600, value=60)
+    st.caption(
+        f"Кэш решений: {len(solve_cache)} записей, {solve_cache.nbytes / 2**20:.1f} МБ, "
+        f"попаданий {solve_cache.hits}, промахов {solve_cache.misses}"
+    )
+
     if st.button("Решить"):
-        x0 = np.zeros(n)
-        x, iterations, norms = Newton_method(x0, eps=1e-10, k=1000)
-
-        if x is not None:
-            st.success(f"Сошлось за {iterations} итераций")
-            st.write("**Приближённое решение:**", *x)
-            st.write(f"**Невязка:** {np.linalg.norm(f(x)):.2e}")
-            exact = np.ones(n)
-            st.write(f"**Погрешность относительно точного решения:** {np.linalg.norm(x - exact):.2e}")
-
-
-            plt.figure(figsize=(6, 3))
-            plt.semilogy(norms, marker='o')
-            plt.title("Сходимость метода Ньютона")
-            plt.xlabel("Итерация")
-            plt.ylabel("‖F(x)‖")
-            st.pyplot(plt)
+        previous = st.session_state.pop("newton_job", None)
+        if previous is not None and previous["job"] is not None:
+            previous["job"].cancel()
+        result = solve_cache.get(cache_key) if use_cache else None
+        if result is not None:
+            st.session_state["newton_job"] = {"key": cache_key, "job": None, "result": result,
+                                              "jacobian": None, "note": "Результат взят из кэша."}
         else:
-            st.error("Метод не сошёлся")
+            x0 = np.zeros(n)
+            note = None
+            nearest = solve_cache.nearest("4.2", n, method_key) if warm_start != "Нули" else None
+            if nearest is not None:
+                near_n, near_x = nearest
+                how = "interpolate" if "интерполяция" in warm_start else "extend"
+                x0 = continue_guess(near_x, n, how)
+                note = f"Начальное приближение построено по решению для n = {near_n}."
+            # Решение идёт в фоновом потоке, а страница только следит за ходом
+            try:
+                job = background.submit(Newton_method, x0, eps=EPS, k=1000, timeout=timeout)
+            except background.PoolBusy as e:
+                st.error(str(e))
+                st.stop()
+            st.session_state["newton_job"] = {"key": cache_key, "job": job, "result": None,
+                                              "jacobian": jacobian, "note": note}
+
+    # Результат показывается, пока параметры совпадают с теми, для которых он получен
+    current = st.session_state.get("newton_job")
+    if current is not None and current["key"] == cache_key:
+        job = current["job"]
+        if current["note"]:
+            st.caption(current["note"])
+
+        if job is not None and not job.done:
+            if st.button("Отменить решение"):
+                job.cancel()
+            chart = st.empty()
+            status = st.empty()
+            # Каждое обновление элементов даёт Streamlit прервать цикл при новом запуске
+            # скрипта (например, по кнопке «Отменить»), поток решателя при этом не блокирует сессию
+            while not job.done:
+                if job.norms:
+                    chart.line_chart(pd.DataFrame({"lg ‖F(x)‖": np.log10(np.maximum(job.norms, 1e-300))}))
+                status.caption(f"Решается… итераций: {len(job.norms)}, прошло {job.elapsed:.1f} с")
+                time.sleep(0.2)
+            chart.empty()
+            status.empty()
+
+        if job is not None and current["result"] is None:
+            if job.status == "done":
+                current["result"] = job.result
+                solve_cache.put(cache_key, job.result)
+            elif job.status in ("cancelled", "timeout"):
+                reason = "отменено" if job.status == "cancelled" else f"остановлено по тайм-ауту ({job.timeout} с)"
+                st.warning(f"Решение {reason} после {len(job.norms)} итераций.")
+                if job.norms:
+                    st.write(f"**Последняя невязка:** {job.norms[-1]:.2e}")
+            elif job.status == "error":
+                st.error(f"Ошибка при решении: {job.error}")
+
+        if current["result"] is not None:
+            x, iterations, norms, *extra = current["result"]
+            jacobian = current["jacobian"]
+
+            if extra:
+                # Стоимость каждой итерации для выбора самой дешёвой стратегии
+                stats = extra[0]
+                st.info(
+                    f"Вычислений F: {sum(row['Вычислений F'] for row in stats)}, "
+                    f"пересчётов матрицы: {sum(row['Пересчёт матрицы'] for row in stats)}, "
+                    f"отброшенных шагов: {sum(not row['Шаг принят'] for row in stats)}"
+                )
+                with st.expander("Стоимость итераций"):
+                    st.dataframe(stats)
+
+            if jacobian is not None:
+                st.info(
+                    f"Вычислений F: {jacobian.evaluations + len(norms)}; при поэлементном возмущении "
+                    f"было бы {jacobian.evaluations + jacobian.saved + len(norms)} "
+                    f"(сэкономлено {jacobian.saved})"
+                )
+
+            if x is not None:
+                if job is None:
+                    st.success(f"Сошлось за {iterations} итераций")
+                else:
+                    st.success(f"Сошлось за {iterations} итераций ({job.elapsed:.3f} с)")
+                if n <= 20:
+                    st.write("**Приближённое решение:**", *x)
+                else:
+                    st.write("**Приближённое решение (первые 10 компонент):**", *x[:10])
+                st.write(f"**Невязка:** {np.linalg.norm(f(x)):.2e}")
+                exact = np.ones(n)
+                st.write(f"**Погрешность относительно точного решения:** {np.linalg.norm(x - exact):.2e}")
+
+
+                def draw(ax):
+                    ax.semilogy(norms, marker='o')
+                    ax.set_title("Сходимость метода Ньютона")
+                    ax.set_xlabel("Итерация")
+                    ax.set_ylabel("‖F(x)‖")
+
+                image = figures.render(("4.2 сходимость", figures.array_key(norms)), draw, figsize=(6, 3))
+                st.image(image, use_container_width=True)
+            else:
+                st.error("Метод не сошёлся")
+
+    # Замер занимает несколько секунд, поэтому идёт только по кнопке,
+    # а результат хранится в сессии и не пересчитывается при каждом прогоне
+    st.caption("Плотный путь запускается только для n ≤ 200: при n = 1000 он занимает десятки секунд.")
+    if st.button("Сравнить время плотного и ленточного решения"):
+        with st.spinner("Замер времени..."):
+            st.session_state["newton_timings"] = newton.compare_timings(
+                [10, 50, 100, 200, 1_000, 10_000, 100_000, 1_000_000], dense_limit=200
+            )
+    if "newton_timings" in st.session_state:
+        st.dataframe(st.session_state["newton_timings"])
+
+
+elif page == "Исследование сходимости":
+    st.title("Области сходимости метода Ньютона")
+    st.markdown("Для каждого сочетания n, ε и разброса σ система решается из нескольких случайных "
+                "начальных приближений. Решения распределяются по процессам, по одному на ядро.")
+
+    method = st.selectbox("Метод:", list(convergence_study.METHODS), format_func=convergence_study.METHODS.get)
+    guess = st.radio("Начальное приближение:", list(convergence_study.GUESSES),
+                     format_func=convergence_study.GUESSES.get)
+    col_min, col_max, col_count = st.columns(3)
+    with col_min:
+        n_min = st.number_input("n от:", 2, 1_000_000, 10)
+    with col_max:
+        n_max = st.number_input("n до:", 2, 1_000_000, 1000)
+    with col_count:
+        count = st.number_input("Точек по n:", 1, 20, 3)
+    sigmas = st.multiselect("Разброс σ:", [0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0], [0.25, 0.5, 1.0, 2.0])
+    eps_values = st.multiselect("Точность ε:", [1e-4, 1e-6, 1e-8, 1e-10, 1e-12], [1e-8], format_func="{:.0e}".format)
+    col_samples, col_k, col_timeout, col_workers = st.columns(4)
+    with col_samples:
+        samples = st.number_input("Случаев на сочетание:", 1, 1000, 20)
+    with col_k:
+        k = st.number_input("Итераций не больше:", 10, 1000, 100)
+    with col_timeout:
+        timeout = st.number_input("Тайм-аут решения, с:", 0.1, 60.0, 5.0)
+    with col_workers:
+        workers = st.number_input("Процессов:", 1, convergence_study.MAX_WORKERS, convergence_study.MAX_WORKERS)
+
+    sizes = root_benchmark.log_sizes(n_min, max(n_min, n_max), count)
+    cases = convergence_study.make_cases(sizes, eps_values, sigmas, samples, guess)
+    st.caption(f"Всего решений: {len(cases)}")
+
+    if st.button("Запустить исследование") and cases:
+        progress_bar = st.progress(0.0, text="Решение...")
+        rows = convergence_study.run_study(
+            cases, method, k, timeout, workers,
+            lambda done: progress_bar.progress(done, text="Решение..."),
+        )
+        progress_bar.empty()
+        st.session_state["convergence_study"] = pd.DataFrame(rows)
+
+    results = st.session_state.get("convergence_study")
+    if results is not None and not results.empty:
+        summary = convergence_study.summarize(results)
+        st.dataframe(summary)
+
+        study_key = figures.array_key(pd.util.hash_pandas_object(results).to_numpy())
+
+        # Доля сходимости к точному решению в зависимости от разброса x0
+        def draw_rate(ax):
+            for (n, eps), group in summary.groupby(["n", "eps"]):
+                ax.plot(group["sigma"], group["Доля сходимости к x = 1"], marker="o", label=f"n = {n}, ε = {eps:.0e}")
+            ax.set_xscale("log")
+            ax.set_xlabel("σ")
+            ax.set_ylabel("Доля сходимости к x = 1")
+            ax.set_ylim(-0.05, 1.05)
+            ax.set_title("Область сходимости")
+            ax.grid(True, which="both", alpha=0.3)
+            ax.legend()
+
+        st.image(figures.render(("4.2 доля сходимости", study_key), draw_rate, figsize=(7, 4)),
+                 use_container_width=True)
+
+        # Каждая точка — одно решение: удалённость x0 от решения и число итераций
+        def draw_outcomes(ax):
+            for outcome, group in results.groupby("Исход"):
+                ax.scatter(group["‖x0 - 1‖∞"], group["Итераций"].fillna(k), s=10, alpha=0.6, label=outcome)
+            ax.set_xscale("log")
+            ax.set_xlabel("‖x0 - 1‖∞")
+            ax.set_ylabel("Итераций")
+            ax.set_title("Исход решения в зависимости от начального приближения")
+            ax.grid(True, which="both", alpha=0.3)
+            ax.legend()
+
+        st.image(figures.render(("4.2 исходы", study_key, k), draw_outcomes, figsize=(7, 4)),
+                 use_container_width=True)
+
+        st.download_button("Скачать все решения (CSV)", results.to_csv(index=False).encode("utf-8"),
+                           file_name="convergence_study.csv", mime="text/csv")
 
 
 elif page == "Решение с SciPy (одномерное)":
@@ -122,48 +352,106 @@ elif page == "Решение с SciPy (одномерное)":
     st.write(f"**Корень уравнения:** {root_val:.5f}")
     st.write(f"Проверка: f({root_val:.5f}) = {f(root_val):.2e}")
 
-    x = np.linspace(-5, 5, 400)
-    y = f(x)
-    plt.figure(figsize=(6, 4))
-    plt.axhline(0, color='gray', lw=1)
-    plt.plot(x, y, label='f(x)')
-    plt.scatter(root_val, f(root_val), color='red', zorder=5, label='Корень')
-    plt.legend()
-    st.pyplot(plt)
+    def draw(ax):
+        x = np.linspace(-5, 5, 400)
+        y = f(x)
+        ax.axhline(0, color='gray', lw=1)
+        ax.plot(x, y, label='f(x)')
+        ax.scatter(root_val, f(root_val), color='red', zorder=5, label='Корень')
+        ax.legend()
+
+    # Уравнение фиксировано — график рисуется один раз на весь сервер
+    st.image(figures.render("4.2 bisect", draw, figsize=(6, 4)), use_container_width=True)
 
 
 elif page == "Решение с SciPy (система)":
     st.title("Решение системы с помощью SciPy (scipy.optimize.root)")
 
-    def f(x):
-        n = len(x)
-        F = np.zeros(n)
-        F[0] = (3 + 2 * x[0]) * x[0] - 2 * x[1] - 3
-        for i in range(1, n - 1):
-            F[i] = (3 + 2 * x[i]) * x[i] - x[i - 1] - 2 * x[i + 1] - 2
-        F[n - 1] = (3 + 2 * x[n - 1]) * x[n - 1] - x[n - 2] - 4
-        return F
-
-
-    n = st.slider("Выберите значение:", 2, 15, 5)
-    method_name = st.selectbox("Выберите метод SciPy:", ["Метод Пауэлла", "Метод Левенберга-Марквардта", "Метод Крылова"])
-    if method_name == "Метод Пауэлла":
-        method = "hybr"
-    elif method_name == "Метод Левенберга-Марквардта":
-        method = "lm"
-    else:
-        method = "krylov"
-    if st.button("Решить систему"):
-
-        x0 = np.zeros(n)
-        sol = root(f, x0, method=method)
-        if sol.success:
-            st.success(f"Решение найдено ({method}) за {sol.nfev} вызовов функции")
+    f = newton.residual
 
-            st.write(f"**Невязка:** {np.linalg.norm(sol.fun):.2e}")
+    mode = st.radio("Режим:", ["Одно решение", "Сравнение методов"], horizontal=True)
 
-            exact = np.ones(n)
-            error = np.linalg.norm(sol.x - exact)
-            st.write(f"**Погрешность относительно точного решения:** {error:.2e}")
+    if mode == "Одно решение":
+        n = st.slider("Выберите значение:", 2, 15, 5)
+        method_name = st.selectbox("Выберите метод SciPy:", ["Метод Пауэлла", "Метод Левенберга-Марквардта", "Метод Крылова"])
+        if method_name == "Метод Пауэлла":
+            method = "hybr"
+        elif method_name == "Метод Левенберга-Марквардта":
+            method = "lm"
         else:
-            st.error(f"Не удалось найти решение: {sol.message}")
+            method = "krylov"
+        if st.button("Решить систему"):
+
+            x0 = np.zeros(n)
+            sol = root(f, x0, method=method)
+            if sol.success:
+                st.success(f"Решение найдено ({method}) за {sol.nfev} вызовов функции")
+
+                st.write(f"**Невязка:** {np.linalg.norm(sol.fun):.2e}")
+
+                exact = np.ones(n)
+                error = np.linalg.norm(sol.x - exact)
+                st.write(f"**Погрешность относительно точного решения:** {error:.2e}")
+            else:
+                st.error(f"Не удалось найти решение: {sol.message}")
+
+    else:
+        st.markdown("Каждый метод запускается для каждого n из логарифмической сетки; "
+                    "погрешность считается относительно точного решения $x_i = 1$. Сошедшимся считается "
+                    f"запуск с невязкой $\\|F\\| < {root_benchmark.TOLERANCE:.0e}$.")
+        methods = st.multiselect("Методы:", list(root_benchmark.METHODS), ["hybr", "lm", "krylov"],
+                                 format_func=lambda m: f"{m} — {root_benchmark.METHODS[m]}")
+        col_min, col_max, col_count = st.columns(3)
+        with col_min:
+            n_min = st.number_input("n от:", 2, 1_000_000, 10)
+        with col_max:
+            n_max = st.number_input("n до:", 2, 1_000_000, 1000)
+        with col_count:
+            count = st.number_input("Точек:", 1, 20, 5)
+        jacobian_mode = st.selectbox("Якобиан:", list(root_benchmark.JACOBIAN_MODES),
+                                     format_func=root_benchmark.JACOBIAN_MODES.get)
+        col_x0, col_dense = st.columns(2)
+        with col_x0:
+            x0_value = st.number_input("Начальное приближение x0 = c·(1, …, 1), c =", value=0.0)
+        with col_dense:
+            dense_limit = st.number_input("Плотные методы (hybr, lm) только при n ≤", 2, 5000, 500)
+
+        if st.button("Запустить сравнение") and methods:
+            sizes = root_benchmark.log_sizes(n_min, max(n_min, n_max), count)
+            progress_bar = st.progress(0.0, text="Сравнение методов...")
+            rows = root_benchmark.run_benchmark(
+                methods, sizes, jacobian_mode, x0_value, dense_limit,
+                lambda done: progress_bar.progress(done, text="Сравнение методов..."),
+            )
+            progress_bar.empty()
+            st.session_state["root_benchmark"] = pd.DataFrame(rows)
+
+        results = st.session_state.get("root_benchmark")
+        if results is not None:
+            st.dataframe(results)
+
+            timed = results.dropna(subset=["Время, с"])
+
+            def draw(ax):
+                for method, group in timed.groupby("Метод"):
+                    ax.loglog(group["n"], group["Время, с"], marker="o", label=method)
+                ax.set_xlabel("n")
+                ax.set_ylabel("Время, с")
+                ax.set_title("Время решения scipy.optimize.root")
+                ax.grid(True, which="both", alpha=0.3)
+                if not timed.empty:
+                    ax.legend()
+
+            image = figures.render(("4.2 root", figures.array_key(pd.util.hash_pandas_object(timed).to_numpy())),
+                                   draw, figsize=(7, 4))
+            st.image(image, use_container_width=True)
+
+            col_csv, col_json = st.columns(2)
+            with col_csv:
+                st.download_button("Скачать CSV", results.to_csv(index=False).encode("utf-8"),
+                                   file_name="root_benchmark.csv", mime="text/csv")
+            with col_json:
+                st.download_button("Скачать JSON", results.to_json(orient="records", force_ascii=False).encode("utf-8"),
+                                   file_name="root_benchmark.json", mime="application/json")
+
+instrument.end_page()
@@ -1,6 +1,11 @@
 import streamlit as st
+import os
+import time
 import pandas as pd
 import numpy as np
+
+from utils import datafiles, instrument, tables
+instrument.start_page("Работа с таблицами")
 st.page_link("./app.py", label="Вернуться на главную")
 st.title("Работа с таблицами")
 
@@ -23,3 +28,95 @@ filtered = data[data["Температура, °C"] > temp_filter]
 st.write(f"Результат фильтрации (T > {temp_filter} °C):")
 st.dataframe(filtered)
 
+
+
+st.header("Большие таблицы")
+
+st.markdown("""
+Таблица хранится в компактных типах (целые — int8/16/32, вещественные — float32, строки — категории или Arrow).
+Для столбца фильтра один раз строится отсортированный индекс: условие по порогу решается двоичным поиском,
+а в браузер отправляется только одна страница результата.
+""")
+
+TABLE_DIR, table_session = datafiles.session_dir("tables", "table_session")
+
+
+# Кэш общий для сессий: несколько таблиц, чтобы сессии не вытесняли таблицы друг друга
+# на каждом прогоне; неиспользуемые освобождаются через час
+@st.cache_resource(max_entries=8, ttl=datafiles.TTL_SECONDS, show_spinner="Загрузка таблицы...")
+def load_big_table(source, key):
+    """Сжатая таблица и статистика; key — размер синтетической таблицы или (путь, mtime) файла"""
+    with instrument.stage("Загрузка таблицы"):
+        if source == "Синтетическая":
+            table = tables.synthetic_weather(key)
+            return table, {"Строк": len(table), "После сжатия, МБ": tables.memory_mb(table)}
+        return tables.read_table(key[0])
+
+
+@st.cache_resource(max_entries=16, ttl=datafiles.TTL_SECONDS, show_spinner="Построение индекса...")
+def load_index(source, key, column):
+    table, _ = load_big_table(source, key)
+    with instrument.stage("Построение индекса"):
+        return tables.SortedIndex(table[column])
+
+
+big_source = st.radio("Таблица:", ["Синтетическая", "Загрузить файл", "Файл на сервере"], horizontal=True)
+table_key = None
+if big_source == "Синтетическая":
+    # По умолчанию таблица небольшая: десятки миллионов строк — по выбору пользователя
+    table_key = int(st.number_input("Строк:", 1_000, 100_000_000, 100_000, step=100_000))
+else:
+    path = None
+    if big_source == "Загрузить файл":
+        uploaded = st.file_uploader("CSV или Parquet", type=["csv", "parquet"])
+        if uploaded is not None:
+            path, _ = datafiles.save_upload(uploaded, TABLE_DIR, table_session, "table_upload")
+    else:
+        path = datafiles.server_file("Файл в каталоге данных сервера:", (".csv", ".parquet"))
+    if path is not None:
+        if os.path.exists(path):
+            table_key = (path, os.path.getmtime(path))
+        else:
+            st.error("Файл не найден.")
+
+if table_key is not None:
+    try:
+        big, table_stats = load_big_table(big_source, table_key)
+    except (OSError, ValueError) as e:
+        st.error(f"Не удалось прочитать таблицу: {e}")
+        st.stop()
+
+    st.caption(", ".join(f"{k}: {v:,.2f}" if isinstance(v, float) else f"{k}: {v:,}" for k, v in table_stats.items()))
+    numeric = list(big.select_dtypes("number").columns)
+    if not numeric:
+        st.warning("В таблице нет числовых столбцов для фильтра.")
+        st.stop()
+
+    col_column, col_op, col_threshold = st.columns([2, 1, 2])
+    with col_column:
+        column = st.selectbox("Столбец фильтра:", numeric)
+    with col_op:
+        op = st.selectbox("Условие:", tables.OPERATORS)
+    index = load_index(big_source, table_key, column)
+    lo = float(index.values[0]) if index.valid else 0.0
+    hi = float(index.values[index.valid - 1]) if index.valid else 0.0
+    with col_threshold:
+        threshold = st.number_input(f"Порог ({lo:g} … {hi:g}):", value=(lo + hi) / 2)
+
+    start = time.perf_counter()
+    positions = index.query(op, threshold)
+    elapsed = time.perf_counter() - start
+    st.write(f"Найдено строк: **{len(positions):,}** из {len(big):,} "
+             f"(поиск по индексу: {elapsed * 1e3:.2f} мс, индекс занимает {index.nbytes / 2**20:.1f} МБ)")
+
+    col_size, col_order, col_page = st.columns(3)
+    with col_size:
+        page_size = st.selectbox("Строк на странице:", [25, 50, 100, 500], index=1)
+    with col_order:
+        descending = st.toggle("По убыванию", value=True)
+    pages = max((len(positions) - 1) // page_size + 1, 1)
+    with col_page:
+        page_no = st.number_input(f"Страница (из {pages:,}):", 1, pages, 1)
+    st.dataframe(tables.page(big, positions, page_no, page_size, descending))
+
+instrument.end_page()
@@ -1,9 +1,13 @@
 import streamlit as st
+import os
+import uuid
 import numpy as np
-import matplotlib.pyplot as plt
 from scipy import integrate, signal
 
+from utils import datafiles, figures, instrument, signal_stream
 
+
+instrument.start_page("Научная графика")
 st.page_link("./app.py", label="⬅ Вернуться на главную")
 
 
@@ -16,54 +20,186 @@ st.markdown("""
 
 st.header("Построение функции sin(x) и её производной")
 
-x = np.linspace(0, 2 * np.pi, 400)
-y = np.sin(x)
-dy = np.cos(x)
+def draw_sin(ax):
+    x = np.linspace(0, 2 * np.pi, 400)
+    y = np.sin(x)
+    dy = np.cos(x)
+    ax.plot(x, y, label="sin(x)")
+    ax.plot(x, dy, '--', label="cos(x) — производная")
+    ax.set_xlabel("x")
+    ax.set_ylabel("Значение функции")
+    ax.set_title("Функция sin(x) и её производная")
+    ax.legend()
+
 
-fig1, ax1 = plt.subplots()
-ax1.plot(x, y, label="sin(x)")
-ax1.plot(x, dy, '--', label="cos(x) — производная")
-ax1.set_xlabel("x")
-ax1.set_ylabel("Значение функции")
-ax1.set_title("Функция sin(x) и её производная")
-ax1.legend()
-st.pyplot(fig1)
+# Статические графики рисуются один раз на весь сервер
+st.image(figures.render("sin", draw_sin), use_container_width=True)
 
 
 st.header("Интегрирование функции sin²(x)")
 
 f = lambda x: np.sin(x) ** 2
-integral, error = integrate.quad(f, 0, np.pi)
+
+
+# Интеграл не зависит от ввода — считается один раз на весь сервер
+@st.cache_data
+def sin2_integral():
+    return integrate.quad(f, 0, np.pi)
+
+
+integral, error = sin2_integral()
 st.write(f"∫ sin²(x) dx от 0 до pi = {integral:.4f} (погрешность ≈ {error:.1e})")
 
-x_vals = np.linspace(0, np.pi, 200)
-y_vals = f(x_vals)
-fig2, ax2 = plt.subplots()
-ax2.plot(x_vals, y_vals, color="tab:orange", label="sin²(x)")
-ax2.fill_between(x_vals, y_vals, alpha=0.3)
-ax2.set_title("Интегрирование функции sin²(x)")
-ax2.legend()
-st.pyplot(fig2)
+def draw_sin2(ax):
+    x_vals = np.linspace(0, np.pi, 200)
+    y_vals = f(x_vals)
+    ax.plot(x_vals, y_vals, color="tab:orange", label="sin²(x)")
+    ax.fill_between(x_vals, y_vals, alpha=0.3)
+    ax.set_title("Интегрирование функции sin²(x)")
+    ax.legend()
+
+
+st.image(figures.render("sin²", draw_sin2), use_container_width=True)
 
 
 st.header("Фильтрация сигнала")
 
 
+# Шум задаётся зерном: при повторном запуске страницы сигнал тот же, и график берётся из кэша
+seed = st.number_input("Зерно генератора шума:", min_value=0, value=0, step=1)
 t = np.linspace(0, 1, 500)
 signal_clean = np.sin(2 * np.pi * 5 * t)
-noise = 0.3 * np.random.randn(500)
+noise = 0.3 * np.random.default_rng(seed).standard_normal(500)
 signal_noisy = signal_clean + noise
 
 
 b, a = signal.butter(4, 0.1)
 signal_filtered = signal.filtfilt(b, a, signal_noisy)
 
-fig3, ax3 = plt.subplots()
-ax3.plot(t, signal_noisy, label="Шумный сигнал", alpha=0.9)
-ax3.plot(t, signal_filtered, label="Отфильтрованный сигнал", linewidth=2)
-ax3.set_xlabel("Время (с)")
-ax3.set_ylabel("Амплитуда")
-ax3.set_title("Фильтрация сигнала с помощью SciPy")
-ax3.legend()
-st.pyplot(fig3)
 
+def draw_filter(ax):
+    ax.plot(t, signal_noisy, label="Шумный сигнал", alpha=0.9)
+    ax.plot(t, signal_filtered, label="Отфильтрованный сигнал", linewidth=2)
+    ax.set_xlabel("Время (с)")
+    ax.set_ylabel("Амплитуда")
+    ax.set_title("Фильтрация сигнала с помощью SciPy")
+    ax.legend()
+
+
+st.image(figures.render(("Фильтрация", seed), draw_filter), use_container_width=True)
+
+
+
+st.header("Фильтрация длинного сигнала")
+
+st.markdown("""
+Сигнал из файла открывается через memmap и фильтруется блоками: фильтр задан секциями второго порядка,
+состояние переносится из блока в блок, поэтому память не зависит от длины сигнала.
+В режиме нулевой фазы соседние блоки перекрываются на время затухания импульсной характеристики.
+""")
+
+
+# Длина затухания импульсной характеристики — до миллиона отсчётов на фильтр
+@st.cache_data(max_entries=64)
+def settling_length(order, cutoff):
+    return signal_stream.settling_length(signal_stream.design_filter(order, cutoff))
+
+
+# Файлы всех сессий лежат в одном каталоге: чужие файлы старше часа и сверх
+# лимита объёма удаляются, файлы этой сессии перезаписываются на месте
+SIGNAL_DIR, session_id = datafiles.session_dir("signals", "signal_session")
+out_path = os.path.join(SIGNAL_DIR, f"filtered_{session_id}.npy")
+
+source = st.radio("Источник сигнала:", ["Синтетический", "Загрузить файл", "Файл на сервере"], horizontal=True)
+x_long = None
+if source == "Синтетический":
+    n_samples = st.number_input("Число отсчётов:", min_value=1_000, max_value=100_000_000, value=10_000_000, step=1_000_000)
+    path = os.path.join(SIGNAL_DIR, f"synthetic_{int(n_samples)}.npy")
+    # Файл в сотни мегабайт создаётся только по кнопке, не при открытии страницы.
+    # Сигнал одинаков для всех сессий и пишется под именем этой сессии, затем
+    # атомарно переименовывается: параллельные генерации не мешают друг другу
+    if not os.path.exists(path) and st.button("Сгенерировать сигнал"):
+        tmp_path = os.path.join(SIGNAL_DIR, f"synthetic_{int(n_samples)}_{session_id}.tmp.npy")
+        with st.spinner("Генерация сигнала..."):
+            signal_stream.synthetic_signal(tmp_path, int(n_samples))
+            os.replace(tmp_path, path)
+    try:
+        # Используемый файл обновляет время изменения, чтобы prune других сессий его не удалял
+        os.utime(path)
+        x_long = signal_stream.open_signal(path)
+    except (OSError, ValueError):
+        x_long = None
+else:
+    dtype = st.selectbox("Тип отсчётов сырого файла (для .npy не нужен):", list(signal_stream.RAW_DTYPES))
+    path = None
+    if source == "Загрузить файл":
+        uploaded = st.file_uploader("Файл .npy или сырые отсчёты", type=None)
+        if uploaded is not None:
+            # Загруженный файл копируется на диск блоками и дальше читается через memmap;
+            # результат фильтрации прежней загрузки удаляется
+            path, new_upload = datafiles.save_upload(uploaded, SIGNAL_DIR, session_id, "signal_upload",
+                                                     (out_path,), signal_stream.CHUNK_SIZE)
+            if new_upload:
+                st.session_state.pop("signal_stats", None)
+    else:
+        path = datafiles.server_file("Файл в каталоге данных сервера:")
+    if path is not None:
+        try:
+            x_long = signal_stream.open_signal(path, dtype)
+        except (OSError, ValueError) as e:
+            st.error(f"Не удалось открыть сигнал: {e}")
+
+if x_long is not None:
+    st.caption(f"Отсчётов: {len(x_long):,}, тип: {x_long.dtype}")
+    col_order, col_cutoff, col_chunk = st.columns(3)
+    with col_order:
+        order = st.slider("Порядок фильтра:", 1, 16, 4)
+    with col_cutoff:
+        cutoff = st.number_input("Частота среза (доля частоты Найквиста):", 0.0001, 0.9999, 0.1, format="%.4f")
+    with col_chunk:
+        chunk_size = st.select_slider("Размер блока:", [2**k for k in range(14, 25)], signal_stream.CHUNK_SIZE)
+    zero_phase = st.checkbox("Нулевая фаза (прямой и обратный проход с перекрытием блоков)")
+    sos = signal_stream.design_filter(order, cutoff)
+    overlap = None
+    if zero_phase:
+        overlap = settling_length(order, cutoff)
+        note = f"; блок увеличен до {overlap:,} отсчётов" if chunk_size < overlap else ""
+        st.caption(f"Перекрытие блоков: {overlap:,} отсчётов{note}")
+
+    if st.button("Отфильтровать"):
+        progress_bar = st.progress(0.0, text="Фильтрация...")
+        with instrument.stage("Фильтрация сигнала"):
+            y_long, stats = signal_stream.filter_to_file(
+                sos, x_long, out_path, chunk_size, zero_phase, overlap,
+                lambda done: progress_bar.progress(done, text="Фильтрация..."),
+            )
+        progress_bar.empty()
+        st.session_state["signal_stats"] = stats
+        st.session_state["signal_run"] = uuid.uuid4().hex
+        del y_long
+
+    stats = st.session_state.get("signal_stats")
+    if stats is not None and stats["Отсчётов"] == len(x_long) and os.path.exists(out_path):
+        col_n, col_time, col_rate = st.columns(3)
+        col_n.metric("Отсчётов", f"{stats['Отсчётов']:,}")
+        col_time.metric("Время", f"{stats['Время, с']:.2f} с")
+        col_rate.metric("Пропускная способность", f"{stats['Отсчётов в секунду'] / 1e6:.1f} млн отсч./с")
+        st.caption(f"Результат (float32, .npy): {out_path}")
+
+        # Весь сигнал прореживается методом min-max до ширины графика прямо из memmap
+        y_long = signal_stream.open_signal(out_path)
+
+        def draw_long(ax):
+            ax.plot(x_long, label="Исходный сигнал", alpha=0.6)
+            ax.plot(y_long, label="Отфильтрованный сигнал", linewidth=1)
+            ax.set_xlabel("Отсчёт")
+            ax.set_ylabel("Амплитуда")
+            ax.set_title("Сигнал целиком (огибающая min-max)")
+            ax.legend()
+
+        image, dropped = figures.render_info(("Длинный сигнал", st.session_state["signal_run"]), draw_long)
+        st.image(image, use_container_width=True)
+        st.caption(f"На графике {2 * len(x_long) - dropped:,} точек из {2 * len(x_long):,}: "
+                   f"отброшено {dropped:,}, минимумы и максимумы сохранены.")
+
+instrument.end_page()
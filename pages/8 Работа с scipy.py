@@ -1,7 +1,12 @@
 import streamlit as st
+import os
 import numpy as np
-import matplotlib.pyplot as plt
+import psutil
 from scipy import integrate, optimize, interpolate
+
+from utils import datafiles, decimate, figures, instrument, interpolation, quadrature
+from utils.expressions import ExpressionError, compile_expression
+instrument.start_page("Работа с SciPy")
 st.page_link("./app.py", label="Вернуться на главную")
 st.title("Работа с SciPy")
 
@@ -17,17 +22,123 @@ st.markdown("""
 st.header("1 Численное интегрирование")
 
 f = lambda x: np.sin(x) ** 2
-res, err = integrate.quad(f, 0, np.pi)
+
+
+# Интеграл не зависит от ввода — считается один раз на весь сервер
+@st.cache_data
+def sin2_integral():
+    return integrate.quad(f, 0, np.pi)
+
+
+res, err = sin2_integral()
 st.write(f"∫ sin²(x) dx от 0 до x = {res:.4f} (погрешность ≈ {err:.1e})")
 
-x = np.linspace(0, np.pi, 200)
-y = f(x)
-fig1, ax1 = plt.subplots()
-ax1.plot(x, y, label="sin²(x)")
-ax1.fill_between(x, y, alpha=0.3)
-ax1.set_title("Интегрирование sin²(x)")
-ax1.legend()
-st.pyplot(fig1)
+def draw_integral(ax):
+    x = np.linspace(0, np.pi, 200)
+    y = f(x)
+    ax.plot(x, y, label="sin²(x)")
+    ax.fill_between(x, y, alpha=0.3)
+    ax.set_title("Интегрирование sin²(x)")
+    ax.legend()
+
+
+# Все графики страницы статические и рисуются один раз на весь сервер
+st.image(figures.render("scipy: интеграл", draw_integral), use_container_width=True)
+
+
+st.subheader("Семейства интегралов")
+
+st.markdown(r"""
+Интеграл $\int_a^b f(x, p)\,dx$ считается сразу для тысяч значений параметра $p$ или для многих отрезков.
+Квадратура Гаусса–Лежандра вычисляет $f$ одним вызовом на массиве всех узлов, адаптивный `quad_vec` дробит
+отрезок для всего семейства сразу. Для сравнения — цикл по `quad`, один интеграл за вызов.
+""")
+
+
+@st.cache_data(max_entries=32, show_spinner="Вычисление интегралов...")
+def integrate_family(expression, family, lo, hi, count, a, b, p, order, panels, epsrel, loop_limit):
+    """Значения семейства и таблица сравнения методов; кэшируется по всем параметрам"""
+    func = compile_expression(expression, ("x", "p"))
+    with instrument.stage("Семейство интегралов"):
+        if family == "Параметр p":
+            grid = np.linspace(lo, hi, count)
+            values, rows = quadrature.compare(func, a, b, grid, order, panels, epsrel, loop_limit)
+        else:
+            edges = np.linspace(lo, hi, count + 1)
+            grid = (edges[:-1] + edges[1:]) / 2
+            values, rows = quadrature.compare(func, edges[:-1], edges[1:], p, order, panels, epsrel, loop_limit)
+    return grid, values, rows
+
+
+expression = st.text_input("Подынтегральная функция f(x, p) =", "sin(p*x)^2")
+try:
+    compile_expression(expression, ("x", "p"))
+except ExpressionError as e:
+    # Ошибка в формуле не должна скрывать остальные разделы страницы
+    st.error(str(e))
+    expression = None
+
+if expression is not None:
+    family = st.radio("Семейство:", ["Параметр p", "Разбиение отрезка"], horizontal=True)
+    col_lo, col_hi, col_count = st.columns(3)
+    if family == "Параметр p":
+        with col_lo:
+            lo = st.number_input("p от:", value=0.1)
+        with col_hi:
+            hi = st.number_input("p до:", value=20.0)
+        with col_count:
+            count = st.number_input("Значений p:", 1, 1_000_000, 5000)
+        col_a, col_b = st.columns(2)
+        with col_a:
+            a = st.number_input("a =", value=0.0)
+        with col_b:
+            b = st.number_input("b =", value=float(np.pi))
+        p = 0.0
+    else:
+        with col_lo:
+            lo = st.number_input("Отрезок от:", value=0.0)
+        with col_hi:
+            hi = st.number_input("Отрезок до:", value=10.0)
+        with col_count:
+            count = st.number_input("Частей:", 1, 1_000_000, 2000)
+        p = st.number_input("p =", value=2.0)
+        a = b = 0.0
+
+    col_order, col_panels, col_eps, col_loop = st.columns(4)
+    with col_order:
+        order = st.select_slider("Узлов Гаусса:", [4, 8, 16, 32, 64], 32)
+    with col_panels:
+        panels = st.number_input("Частей отрезка:", 1, 64, 4)
+    with col_eps:
+        epsrel = st.select_slider("ε для quad_vec:", [1e-4, 1e-6, 1e-8, 1e-10, 1e-12], 1e-10, format_func="{:.0e}".format)
+    with col_loop:
+        loop_limit = st.number_input("Интегралов в цикле quad:", 10, 100_000, 200)
+
+    if st.button("Вычислить семейство"):
+        st.session_state["quad_family"] = (expression, family, lo, hi, int(count), a, b, p,
+                                           order, int(panels), epsrel, int(loop_limit))
+
+    if "quad_family" in st.session_state:
+        args = st.session_state["quad_family"]
+        try:
+            result = integrate_family(*args)
+        except ExpressionError as e:
+            # Ошибка вычисления формулы не должна скрывать остальные разделы страницы
+            st.error(str(e))
+            result = None
+        if result is not None:
+            grid, values, rows = result
+            st.dataframe(rows)
+
+            def draw_family(ax):
+                ax.plot(grid, values["gauss"], label="Гаусс–Лежандр")
+                ax.set_xlabel("p" if args[1] == "Параметр p" else "Середина отрезка")
+                ax.set_ylabel("Интеграл")
+                ax.set_title(f"∫ {args[0]} dx")
+                ax.grid(True)
+                ax.legend()
+
+            st.image(figures.render(("scipy: семейство", args), draw_family), use_container_width=True)
 
 
 st.header("2 Нахождение корня уравнения")
@@ -36,30 +147,145 @@ eq = lambda x: np.cos(x) - x
 root = optimize.root_scalar(eq, bracket=[0, 1])
 st.write(f"Решение уравнения cos(x) = x → x ≈ {root.root:.5f}")
 
-x = np.linspace(0, 1, 100)
-fig2, ax2 = plt.subplots()
-ax2.plot(x, np.cos(x), label="cos(x)")
-ax2.plot(x, x, label="y=x")
-ax2.scatter(root.root, np.cos(root.root), color="red", zorder=5, label="корень")
-ax2.legend()
-ax2.set_title("Нахождение корня cos(x) = x")
-st.pyplot(fig2)
+def draw_root(ax):
+    x = np.linspace(0, 1, 100)
+    ax.plot(x, np.cos(x), label="cos(x)")
+    ax.plot(x, x, label="y=x")
+    ax.scatter(root.root, np.cos(root.root), color="red", zorder=5, label="корень")
+    ax.legend()
+    ax.set_title("Нахождение корня cos(x) = x")
+
+
+st.image(figures.render("scipy: корень", draw_root), use_container_width=True)
 
 
 st.header("3 Интерполяция данных")
 
 x_data = np.linspace(0, 10, 8)
 y_data = np.sin(x_data)
-interp = interpolate.interp1d(x_data, y_data, kind='cubic')
+
+
+# Тот же кубический сплайн, что interp1d(kind='cubic'), строится один раз на весь сервер
+@st.cache_resource
+def demo_spline():
+    return interpolate.make_interp_spline(x_data, y_data, k=3)
+
 
 x_new = np.linspace(0, 10, 200)
-y_new = interp(x_new)
+y_new = demo_spline()(x_new)
+
+def draw_interpolation(ax):
+    ax.plot(x_data, y_data, 'o', label="исходные точки")
+    ax.plot(x_new, y_new, '-', label="кубическая интерполяция")
+    ax.legend()
+    ax.set_title("Интерполяция функции sin(x)")
+
+
+st.image(figures.render("scipy: интерполяция", draw_interpolation), use_container_width=True)
+
+
+
+
+st.subheader("Интерполяция больших наборов точек")
+
+st.markdown("""
+Узлы читаются из файла через memmap. Сплайн строится один раз для данных и кэшируется по хэшу их содержимого,
+а значения на большой сетке запросов вычисляются блоками в пуле потоков и пишутся в файл.
+""")
+
+INTERP_DIR, interp_session = datafiles.session_dir("interpolation", "interp_session")
+
+
+@st.cache_data(max_entries=16, show_spinner="Хэширование узлов...")
+def knots_digest(path, mtime_ns, size):
+    """Хэш узлов файла; пересчитывается только при изменении файла"""
+    return interpolation.data_digest(*interpolation.open_samples(path))
+
+
+@st.cache_resource(max_entries=4, show_spinner="Построение сплайна...")
+def get_spline(digest, kind, path):
+    """Сплайн по узлам из path; digest в ключе кэша связывает сплайн с содержимым файла"""
+    with instrument.stage("Построение сплайна"):
+        return interpolation.fit_spline(*interpolation.open_samples(path), kind)
+
+
+knots_source = st.radio("Узлы:", ["Синтетические", "Загрузить файл", "Файл на сервере"], horizontal=True)
+knots_path = None
+if knots_source == "Синтетические":
+    n_knots = st.number_input("Число узлов:", min_value=4, max_value=50_000_000, value=1_000_000, step=100_000)
+    knots_path = os.path.join(INTERP_DIR, f"synthetic_{int(n_knots)}.npy")
+    # Большой файл узлов создаётся только по кнопке, не при открытии страницы
+    if not os.path.exists(knots_path) and st.button("Сгенерировать узлы"):
+        with st.spinner("Генерация узлов..."):
+            interpolation.synthetic_samples(knots_path + ".tmp.npy", int(n_knots))
+            os.replace(knots_path + ".tmp.npy", knots_path)
+    if not os.path.exists(knots_path):
+        knots_path = None
+elif knots_source == "Загрузить файл":
+    uploaded = st.file_uploader("Файл .npy формы (n, 2) или CSV со столбцами x, y", type=["npy", "csv"])
+    if uploaded is not None:
+        # Значения по прежней загрузке больше не нужны
+        knots_path, _ = datafiles.save_upload(uploaded, INTERP_DIR, interp_session, "interp_upload",
+                                              (os.path.join(INTERP_DIR, f"values_{interp_session}.npy"),),
+                                              interpolation.CHUNK_SIZE)
+else:
+    knots_path = datafiles.server_file("Файл узлов в каталоге данных сервера:", (".npy", ".csv"))
+
+knots = None
+if knots_path is not None:
+    try:
+        knots = interpolation.open_samples(knots_path)
+        stat = os.stat(knots_path)
+        digest = knots_digest(knots_path, stat.st_mtime_ns, stat.st_size)
+    except (OSError, ValueError) as e:
+        st.error(f"Не удалось открыть узлы: {e}")
+        knots = None
+
+if knots is not None:
+    x_knots, y_knots = knots
+    kind = st.selectbox("Интерполяция:", list(interpolation.KINDS), format_func=interpolation.KINDS.get)
+    st.caption(f"Узлов: {len(x_knots):,}, хэш данных: {digest[:16]}")
+    spline, fit_stats = get_spline(digest, kind, knots_path)
+
+    x_min, x_max = interpolation.domain(spline)
+    col_count, col_chunk, col_workers = st.columns(3)
+    with col_count:
+        query_count = st.number_input("Точек запроса:", 2, 200_000_000, 10_000_000, step=1_000_000)
+    with col_chunk:
+        query_chunk = st.select_slider("Размер блока:", [2**k for k in range(14, 25)], interpolation.CHUNK_SIZE)
+    with col_workers:
+        query_workers = st.number_input("Потоков:", 1, 64, os.cpu_count() or 1)
+
+    if st.button("Вычислить сплайн на сетке"):
+        out_path = os.path.join(INTERP_DIR, f"values_{interp_session}.npy")
+        rss_before = psutil.Process().memory_info().rss
+        progress_bar = st.progress(0.0, text="Вычисление...")
+        with instrument.stage("Вычисление сплайна на сетке"):
+            values, eval_stats = interpolation.evaluate_grid(
+                spline, x_min, x_max, int(query_count), out_path, query_chunk, int(query_workers),
+                lambda done: progress_bar.progress(done, text="Вычисление..."),
+            )
+        progress_bar.empty()
+        eval_stats["Прирост памяти процесса, МБ"] = (psutil.Process().memory_info().rss - rss_before) / 2**20
+
+        col_fit, col_rate, col_memory = st.columns(3)
+        col_fit.metric("Построение сплайна", f"{fit_stats['Построение, с']:.2f} с")
+        col_rate.metric("Вычисление", f"{eval_stats['Точек в секунду'] / 1e6:.1f} млн точек/с")
+        col_memory.metric("Коэффициенты сплайна", f"{fit_stats['Коэффициенты, МБ']:.1f} МБ")
+        st.dataframe([{**fit_stats, **eval_stats}])
+        st.caption(f"Значения (float64, .npy): {out_path}")
+
+        # Сетка запросов не хранится: точки для графика восстанавливаются по номерам
+        shown = decimate.minmax_indices(values)
+        x_shown = x_min + (x_max - x_min) / max(int(query_count) - 1, 1) * shown
 
-fig3, ax3 = plt.subplots()
-ax3.plot(x_data, y_data, 'o', label="исходные точки")
-ax3.plot(x_new, y_new, '-', label="кубическая интерполяция")
-ax3.legend()
-ax3.set_title("Интерполяция функции sin(x)")
-st.pyplot(fig3)
+        def draw_spline(ax):
+            ax.plot(x_knots, y_knots, ".", markersize=2, label="узлы")
+            ax.plot(x_shown, values[shown], label=interpolation.KINDS[kind])
+            ax.legend()
+            ax.set_title("Сплайн по узлам")
 
+        st.image(figures.render(("scipy: сплайн", digest, kind, int(query_count)), draw_spline),
+                 use_container_width=True)
 
+instrument.end_page()
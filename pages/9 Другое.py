@@ -1,59 +1,98 @@
 import streamlit as st
 import pandas as pd
-import json
-import csv
-from shapely.geometry import shape
-import geopandas as gpd
 import pydeck as pdk
 
-# Увеличиваем лимит размера полей CSV
-csv.field_size_limit(10_000_000)
+from utils import instrument, routes
 
+instrument.start_page("Маршруты")
 st.page_link("./app.py", label="⬅ Вернуться на главную")
 st.title("Маршруты мусороуборочных машин в Америке")
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("dataset/solid-waste-and-recycling-collection-routes-1.csv", sep=";")
-    return df
-
-df = load_data()
-
-# Проверяем, что колонка geo_shape есть
-if "geo_shape" not in df.columns:
-    st.error("В файле отсутствует колонка 'geo_shape'. Проверь формат CSV.")
+# Кэшируется весь конвейер (GeoParquet-копия или CSV + разбор геометрии).
+# Ключ — путь, время изменения файла и версия конвейера. cache_resource отдаёт
+# один и тот же объект без копирования, поэтому gdf дальше не изменяем.
+# Хранится одна версия данных: после изменения файла прежняя вытесняется.
+@st.cache_resource(max_entries=1, show_spinner="Подготовка маршрутов...")
+def load_routes(path, mtime, version):
+    with instrument.stage("Загрузка и разбор геометрии"):
+        return routes.load_routes(path, mtime, version)
+
+# Индекс по дням строится один раз на версию данных
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_day_index(path, mtime, version):
+    return routes.build_day_index(load_routes(path, mtime, version))
+
+# Упрощённые уровни детализации геометрии считаются заранее
+@st.cache_resource(max_entries=1, show_spinner="Упрощение геометрии...")
+def load_lod_tiers(path, mtime, version):
+    geometry = load_routes(path, mtime, version).geometry.to_numpy()
+    with instrument.stage("Упрощение геометрии"):
+        return routes.build_lod_tiers(geometry)
+
+# Пространственный индекс для поиска маршрутов по точке и области
+@st.cache_resource(max_entries=1, show_spinner="Построение пространственного индекса...")
+def load_spatial_index(path, mtime, version):
+    geometry = load_routes(path, mtime, version).geometry.to_numpy()
+    with instrument.stage("Пространственный индекс"):
+        return routes.build_spatial_index(geometry)
+
+try:
+    # Пересборка GeoParquet-копии идёт вне кэшируемых функций: CSV читается
+    # порциями, и прогресс выводится в элемент, созданный в этом прогоне.
+    # Проверка копии повторяется, только когда изменился ключ источника
+    source = routes.source_key(routes.DATASET_PATH)
+    if st.session_state.get("routes_checked_source") != source and not routes.sidecar_is_fresh(routes.DATASET_PATH):
+        progress_bar = st.progress(0.0, text="Чтение CSV по частям...")
+        with instrument.stage("Чтение CSV"):
+            routes.build_sidecar(
+                routes.DATASET_PATH,
+                lambda done: progress_bar.progress(done, text="Чтение CSV по частям..."),
+            )
+        progress_bar.empty()
+
+    gdf = load_routes(*source, routes.PIPELINE_VERSION)
+    day_index = load_day_index(*source, routes.PIPELINE_VERSION)
+    lod_tiers = load_lod_tiers(*source, routes.PIPELINE_VERSION)
+    tree = load_spatial_index(*source, routes.PIPELINE_VERSION)
+    st.session_state["routes_checked_source"] = source
+except ValueError as e:
+    st.error(str(e))
     st.stop()
 
-# Удаляем строки с пустой геометрией
-df = df.dropna(subset=["geo_shape"])
-
-# Функция для разбора поля geo_shape (оно содержит JSON с координатами)
-def parse_geometry(geo_str):
-    try:
-        geojson = json.loads(geo_str)
-        return shape(geojson)
-    except Exception:
-        return None
-
-df["geometry"] = df["geo_shape"].apply(parse_geometry)
-gdf = gpd.GeoDataFrame(df, geometry="geometry", crs="EPSG:4326").dropna(subset=["geometry"])
-
-# Фильтр по дню недели
-selected_day = st.selectbox("Выберите день недели:", sorted(gdf["day"].dropna().unique()))
-
-day_gdf = gdf[gdf["day"] == selected_day]
-
-if day_gdf.empty:
-    st.warning(f"Нет данных для {selected_day}")
-else:
-    st.subheader(f"Отображение маршрутов на {selected_day.lower()}")
-
-    # Получаем координаты для центра карты
-    centroid = day_gdf.geometry.centroid.unary_union.centroid
-    center = [centroid.y, centroid.x]
-
-    # Преобразуем полигоны в формат GeoJSON
-    geojson = day_gdf.__geo_interface__
+bad_rows = gdf.attrs.get("bad_geometry_rows", [])
+if bad_rows:
+    with st.expander(f"Строк с некорректной геометрией: {len(bad_rows)} (пропущены)"):
+        st.write(bad_rows)
+
+mode = st.radio(
+    "Режим:",
+    ["По дню недели", "Поиск по координатам", "Пакетный поиск (CSV)", "Область на карте"],
+    horizontal=True,
+)
+
+# Детализация полигонов: чем мельче масштаб, тем меньше вершин отправляем в браузер
+AUTO_LOD = "Авто (по масштабу)"
+col_zoom, col_lod = st.columns(2)
+with col_zoom:
+    zoom = st.slider("Масштаб карты:", 8, 18, 11)
+with col_lod:
+    lod_choice = st.selectbox("Уровень детализации:", [AUTO_LOD, *routes.LOD_TOLERANCES])
+tier = routes.tier_for_zoom(zoom) if lod_choice == AUTO_LOD else lod_choice
+
+# Общие границы данных — значения по умолчанию для полей ввода
+all_bounds = (
+    min(p.bounds[0] for p in day_index.values()),
+    min(p.bounds[1] for p in day_index.values()),
+    max(p.bounds[2] for p in day_index.values()),
+    max(p.bounds[3] for p in day_index.values()),
+)
+
+
+def render_routes(positions, center, extra_layers=()):
+    """Отрисовка выбранных маршрутов на карте со статистикой детализации"""
+    # Преобразуем полигоны выбранного уровня детализации в формат GeoJSON
+    with instrument.stage("Сериализация GeoJSON"):
+        geojson = routes.routes_geojson(gdf, positions, lod_tiers[tier])
 
     # Создаем слой
     layer = pdk.Layer(
@@ -67,7 +106,114 @@ else:
         get_line_color=[0, 0, 0],
     )
 
-    view_state = pdk.ViewState(latitude=center[0], longitude=center[1], zoom=11)
-    st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=view_state))
+    view_state = pdk.ViewState(latitude=center[0], longitude=center[1], zoom=zoom)
+    with instrument.stage("Отправка карты"):
+        st.pydeck_chart(pdk.Deck(layers=[layer, *extra_layers], initial_view_state=view_state))
+
+    st.caption(
+        f"Уровень детализации: {tier} — "
+        f"вершин: {routes.vertex_count(lod_tiers[tier][positions]):,}, "
+        f"объём данных: {routes.payload_bytes(geojson) / 1024:,.0f} КБ"
+    )
+
+    # Сравнение уровней требует сериализации каждого из них, поэтому только по запросу
+    if st.checkbox("Сравнить уровни детализации"):
+        st.dataframe({
+            "Уровень": list(lod_tiers),
+            "Допуск, °": list(routes.LOD_TOLERANCES.values()),
+            "Вершин": [routes.vertex_count(g[positions]) for g in lod_tiers.values()],
+            "Объём, КБ": [
+                round(routes.payload_bytes(routes.routes_geojson(gdf, positions, g)) / 1024, 1)
+                for g in lod_tiers.values()
+            ],
+        })
+
+
+def point_layer(lat, lon):
+    return pdk.Layer(
+        "ScatterplotLayer",
+        pd.DataFrame({"lat": lat, "lon": lon}),
+        get_position=["lon", "lat"],
+        get_radius=60,
+        get_fill_color=[220, 30, 30],
+    )
+
 
-    st.metric("Средняя площадь маршрута (м²)", f"{day_gdf['square_miles'].mean() * 2_589_988.11:,.0f}")
+if mode == "По дню недели":
+    # Фильтр по дню недели
+    selected_day = st.selectbox("Выберите день недели:", list(day_index))
+
+    partition = day_index.get(selected_day)
+
+    if partition is None:
+        st.warning(f"Нет данных для {selected_day}")
+    else:
+        st.subheader(f"Отображение маршрутов на {selected_day.lower()}")
+        render_routes(partition.positions, partition.center)
+        st.metric("Средняя площадь маршрута (м²)", f"{partition.mean_square_miles * 2_589_988.11:,.0f}")
+
+elif mode == "Поиск по координатам":
+    col_lat, col_lon = st.columns(2)
+    with col_lat:
+        lat = st.number_input("Широта:", value=(all_bounds[1] + all_bounds[3]) / 2, format="%.6f")
+    with col_lon:
+        lon = st.number_input("Долгота:", value=(all_bounds[0] + all_bounds[2]) / 2, format="%.6f")
+
+    matches = routes.lookup_points(tree, gdf, [lat], [lon])
+    if matches.empty:
+        st.warning("Эта точка не обслуживается ни одним маршрутом.")
+    else:
+        st.success("Дни вывоза: " + ", ".join(sorted(matches["day"].dropna().unique())))
+        st.dataframe(matches.drop(columns=["point", "route_position"]))
+        render_routes(matches["route_position"].to_numpy(), (lat, lon), [point_layer([lat], [lon])])
+
+elif mode == "Пакетный поиск (CSV)":
+    st.markdown("Загрузите CSV с колонками `lat` и `lon` (широта и долгота адресов).")
+    uploaded = st.file_uploader("Файл с адресами", type="csv")
+    if uploaded is not None:
+        points = pd.read_csv(uploaded, sep=None, engine="python")
+        if not {"lat", "lon"} <= set(points.columns):
+            st.error("В файле должны быть колонки 'lat' и 'lon'.")
+            st.stop()
+
+        # Нечисловые и пустые координаты отбрасываются, номера строк остаются исходными
+        coords = points[["lat", "lon"]].apply(pd.to_numeric, errors="coerce")
+        bad = coords.isna().any(axis=1)
+        if bad.any():
+            st.warning(f"Строк с некорректными координатами: {int(bad.sum()):,} (пропущены)")
+            with st.expander("Пропущенные строки"):
+                st.dataframe(points[bad].head(1000))
+        coords = coords[~bad]
+        if coords.empty:
+            st.error("В файле нет строк с числовыми координатами.")
+            st.stop()
+
+        matches = routes.lookup_points(tree, gdf, coords["lat"], coords["lon"])
+        matches["point"] = coords.index.to_numpy()[matches["point"].to_numpy()]
+        covered = matches["point"].nunique()
+        st.success(f"Адресов: {len(coords):,}, обслуживаются: {covered:,}, вне маршрутов: {len(coords) - covered:,}")
+        st.dataframe(matches.head(1000).drop(columns="route_position"))
+        st.download_button(
+            "Скачать результат (CSV)",
+            matches.drop(columns="route_position").to_csv(index=False).encode("utf-8"),
+            file_name="routes_lookup.csv",
+            mime="text/csv",
+        )
+
+elif mode == "Область на карте":
+    col_min, col_max = st.columns(2)
+    with col_min:
+        min_lat = st.number_input("Широта от:", value=all_bounds[1], format="%.6f")
+        min_lon = st.number_input("Долгота от:", value=all_bounds[0], format="%.6f")
+    with col_max:
+        max_lat = st.number_input("Широта до:", value=all_bounds[3], format="%.6f")
+        max_lon = st.number_input("Долгота до:", value=all_bounds[2], format="%.6f")
+
+    positions = routes.query_bbox(tree, (min_lon, min_lat, max_lon, max_lat))
+    if len(positions) == 0:
+        st.warning("В выбранной области маршрутов нет.")
+    else:
+        st.write(f"Маршрутов в области: {len(positions):,}")
+        render_routes(positions, ((min_lat + max_lat) / 2, (min_lon + max_lon) / 2))
+
+instrument.end_page()
@@ -0,0 +1,126 @@
+"""Фоновое выполнение решателей с потоковой передачей хода сходимости."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import instrument
+
+# Общий пул на весь сервер: одновременно решается не больше MAX_WORKERS задач,
+# в очереди — не больше MAX_PENDING, остальные запросы отклоняются
+MAX_WORKERS = 4
+MAX_PENDING = 16
+
+_executor = None
+_jobs = set()
+_lock = threading.Lock()
+
+
+class SolveCancelled(Exception):
+    """Решение остановлено пользователем или по тайм-ауту"""
+
+
+class PoolBusy(RuntimeError):
+    """Очередь фоновых решений переполнена"""
+
+
+class SolveJob:
+    """Задача в пуле: результат решателя, нормы по итерациям и отмена.
+
+    Решатель получает колбэк job.progress и вызывает его с нормой на каждой
+    итерации; колбэк копит нормы для графика и прерывает решение исключением
+    SolveCancelled после cancel() или по истечении timeout секунд.
+    status: pending, running, done, cancelled, timeout, error.
+    Время успешного решения записывается этапом «Итерации решателя»
+    страницы, с которой задача отправлена.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.norms = []
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.future = None
+        self.page = instrument.current_page()
+        self._cancel = threading.Event()
+
+    def progress(self, norm):
+        self.norms.append(float(norm))
+        if self._cancel.is_set():
+            raise SolveCancelled("cancelled")
+        if self.timeout is not None and time.perf_counter() - self.started > self.timeout:
+            raise SolveCancelled("timeout")
+
+    def cancel(self):
+        self._cancel.set()
+        # Задача ещё в очереди — снимаем её, не дожидаясь запуска
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+
+    @property
+    def done(self):
+        return self.future is None or self.future.done()
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def wait(self, timeout=None):
+        """Дождаться завершения (для скриптов и тестов без интерфейса)"""
+        if self.future is not None:
+            try:
+                self.future.exception(timeout)
+            except Exception:
+                pass
+        return self
+
+    def _run(self, fn, args, kwargs):
+        self.started = time.perf_counter()
+        self.status = "running"
+        try:
+            if self._cancel.is_set():
+                raise SolveCancelled("cancelled")
+            self.result = fn(*args, callback=self.progress, **kwargs)
+            self.status = "done"
+            instrument.record("Итерации решателя", time.perf_counter() - self.started, self.page)
+        except SolveCancelled as e:
+            self.status = str(e)
+        except Exception as e:
+            self.error = e
+            self.status = "error"
+        finally:
+            self.finished = time.perf_counter()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="solve")
+    return _executor
+
+
+def active_jobs():
+    """Число задач, которые ещё решаются или ждут в очереди"""
+    with _lock:
+        _jobs.difference_update([job for job in _jobs if job.done])
+        return len(_jobs)
+
+
+def submit(fn, *args, timeout=None, **kwargs):
+    """Запустить fn(*args, callback=..., **kwargs) в пуле потоков.
+
+    Возвращает SolveJob сразу, не дожидаясь решения. Если в пуле уже
+    MAX_PENDING незавершённых задач, бросает PoolBusy.
+    """
+    job = SolveJob(timeout)
+    with _lock:
+        _jobs.difference_update([j for j in _jobs if j.done])
+        if len(_jobs) >= MAX_PENDING:
+            raise PoolBusy("Сервер занят: слишком много решений выполняется одновременно")
+        job.future = _get_executor().submit(job._run, fn, args, kwargs)
+        _jobs.add(job)
+    return job
@@ -0,0 +1,125 @@
+"""Векторный поиск корней методом бисекций (задание 4.1)."""
+import numpy as np
+
+
+def find_sign_changes(f, start, end, step=0.1):
+    """Все интервалы смены знака функции на сетке с шагом step.
+
+    Функция вычисляется на всей сетке одним вызовом. Узлы сетки считаются
+    как start + k * step, поэтому шаг не накапливает ошибку округления.
+    Возвращает массив формы (m, 2) с концами интервалов. Узел, в котором
+    функция точно равна нулю, входит только в интервал слева от него,
+    иначе один корень дал бы два интервала.
+    """
+    count = int(np.floor((end - start) / step + 1e-9))
+    x = start + step * np.arange(count + 1)
+    y = f(x)
+    found = y[:-1] * y[1:] <= 0
+    found[1:] &= y[1:-1] != 0
+    idx = np.flatnonzero(found)
+    return np.column_stack([x[idx], x[idx + 1]])
+
+
+# Строка лога итераций: компактный типизированный формат вместо кортежей Python
+LOG_DTYPE = np.dtype([("iteration", np.int32), ("a", np.float64), ("b", np.float64),
+                      ("c", np.float64), ("fc", np.float64)])
+
+
+class IterationLog:
+    """История итераций всех интервалов в одном заранее выделенном массиве.
+
+    Строки интервала k лежат подряд в data[offsets[k]:offsets[k] + lengths[k]].
+    Размер каждого блока — верхняя оценка числа итераций бисекции, поэтому
+    массив не приходится наращивать во время решения.
+    """
+
+    def __init__(self, capacities):
+        capacities = np.asarray(capacities, dtype=np.int64)
+        self.capacities = capacities
+        self.offsets = np.concatenate([[0], np.cumsum(capacities)[:-1]]).astype(np.int64)
+        self.lengths = np.zeros(len(capacities), dtype=np.int64)
+        self.data = np.zeros(int(capacities.sum()), dtype=LOG_DTYPE)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def record(self, idx, iteration, a, b, c, fc):
+        if np.any(iteration > self.capacities[idx]):
+            raise IndexError("Число итераций превысило выделенный под лог размер")
+        rows = self.offsets[idx] + iteration - 1
+        self.data["iteration"][rows] = iteration
+        self.data["a"][rows] = a
+        self.data["b"][rows] = b
+        self.data["c"][rows] = c
+        self.data["fc"][rows] = fc
+        self.lengths[idx] = iteration
+
+    def bracket(self, k, start=0, stop=None):
+        """Строки интервала k (срез без копирования)"""
+        length = self.lengths[k]
+        stop = length if stop is None else min(stop, length)
+        return self.data[self.offsets[k] + start:self.offsets[k] + stop]
+
+
+def bisection_many(f, a, b, eps=1e-8, max_iter=1000, log=False, callback=None):
+    """Метод бисекций сразу для всех интервалов [a[i], b[i]].
+
+    Все интервалы делятся пополам одновременно: на каждой итерации функция
+    вычисляется один раз для массива середин ещё не сошедшихся интервалов.
+    Критерий остановки и число итераций совпадают с построчной версией.
+
+    Возвращает (roots, iterations, history). roots[i] = nan, если на концах
+    интервала функция одного знака. Если функция равна нулю на конце
+    интервала, корнем считается этот конец (iterations[i] = 0). Если log=True, history — IterationLog
+    с ходом вычислений, иначе None. callback(width), если задан, получает
+    на каждой итерации наибольшую длину ещё не сошедшегося интервала.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    roots = np.full(a.shape, np.nan)
+    iterations = np.zeros(a.shape, dtype=int)
+
+    history = None
+    if log:
+        # Интервал перестаёт делиться, когда его длина меньше eps, поэтому
+        # итераций не больше floor(log2((b - a) / eps)) + 2 (+1 на округление).
+        # Если eps сравним с шагом сетки чисел double, длина может так и не
+        # стать меньше eps — тогда резервируем max_iter строк.
+        bound = np.floor(np.log2(np.maximum(b - a, eps) / eps)) + 3
+        resolvable = eps > 4 * np.spacing(np.maximum(np.abs(a), np.abs(b)))
+        bound = np.where(resolvable, bound, max_iter)
+        history = IterationLog(np.minimum(bound, max_iter).astype(np.int64))
+
+    fa, fb = f(a), f(b)
+    # Точный ноль на конце — готовый корень, бисекция ушла бы к другому концу
+    exact = (fa == 0) | (fb == 0)
+    roots[exact] = np.where(fa[exact] == 0, a[exact], b[exact])
+    idx = np.flatnonzero((fa * fb < 0) & ~exact)
+    a, b, fa = a[idx], b[idx], fa[idx]
+
+    for i in range(1, max_iter + 1):
+        if idx.size == 0:
+            break
+        if callback is not None:
+            callback(np.max(b - a))
+        c = (a + b) / 2
+        fc = f(c)
+        if log:
+            history.record(idx, i, a, b, c, fc)
+
+        done = (np.abs(fc) < eps) | ((b - a) < eps)
+        roots[idx[done]] = c[done]
+        iterations[idx[done]] = i
+
+        left = fa * fc < 0
+        b = np.where(left, c, b)
+        a = np.where(left, a, c)
+        fa = np.where(left, fa, fc)
+
+        keep = ~done
+        idx, a, b, fa = idx[keep], a[keep], b[keep], fa[keep]
+
+    # Не сошедшиеся за max_iter итераций интервалы
+    roots[idx] = (a + b) / 2
+    iterations[idx] = max_iter
+    return roots, iterations, history
@@ -0,0 +1,183 @@
+"""Исследование областей сходимости метода Ньютона для системы 4.2.
+
+Сетка случаев (n, начальное приближение, ε) решается параллельно в пуле
+процессов: каждый случай — независимое решение из своего x0.
+"""
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from utils.newton import newton_banded, newton_dense, newton_reuse, residual, residual_loop
+
+METHODS = {
+    "banded": "Ньютон, ленточная матрица",
+    "chord": "Метод хорд",
+    "broyden": "Метод Бройдена",
+    "dense": "Ньютон, плотная матрица (n ≤ 200)",
+}
+
+GUESSES = {
+    "perturbed": "Возмущённое точное решение: x0 = 1 + σ·N(0, 1)",
+    "random": "Случайное: x0 ~ U(-σ, σ)",
+}
+
+# Исходы решения
+CONVERGED = "сошёлся к x = 1"
+OTHER_ROOT = "сошёлся к другому решению"
+DIVERGED = "не сошёлся"
+SINGULAR = "вырожденная матрица Якоби"
+TIMEOUT = "тайм-аут"
+
+DENSE_LIMIT = 200
+
+# Один пул на процесс сервера на все ядра; сессии делят его и не пересоздают
+MAX_WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class _Timeout(Exception):
+    pass
+
+
+def make_cases(sizes, eps_values, scales, samples, guess="perturbed", seed=0):
+    """Все сочетания (n, ε, σ) по samples случайных начальных приближений.
+
+    Каждый случай получает свой seed, поэтому x0 воспроизводится в любом процессе.
+    """
+    cases = []
+    for n in sizes:
+        for eps in eps_values:
+            for scale in scales:
+                for sample in range(samples):
+                    cases.append({"n": int(n), "eps": float(eps), "guess": guess, "sigma": float(scale),
+                                  "seed": seed + len(cases)})
+    return cases
+
+
+def initial_guess(case):
+    rng = np.random.default_rng(case["seed"])
+    n, sigma = case["n"], case["sigma"]
+    if case["guess"] == "random":
+        return rng.uniform(-sigma, sigma, n)
+    return 1 + sigma * rng.standard_normal(n)
+
+
+def run_case(case, method="banded", k=200, timeout=None):
+    """Решает один случай и возвращает строку таблицы результатов"""
+    x0 = initial_guess(case)
+    row = dict(case)
+    row["‖x0 - 1‖∞"] = float(np.max(np.abs(x0 - 1)))
+
+    start = time.perf_counter()
+
+    def callback(norm):
+        if timeout is not None and time.perf_counter() - start > timeout:
+            raise _Timeout
+
+    x = x0.copy()
+    try:
+        if method == "dense":
+            x, iterations, norms = newton_dense(x, case["eps"], k, residual_loop, callback)
+        elif method == "banded":
+            x, iterations, norms = newton_banded(x, case["eps"], k, residual, callback)
+        else:
+            x, iterations, norms, _ = newton_reuse(x, case["eps"], k, residual, strategy=method,
+                                                   callback=callback)
+    except _Timeout:
+        x, iterations, norms, status = None, None, [], TIMEOUT
+    else:
+        if x is not None:
+            status = CONVERGED if np.max(np.abs(x - 1)) < 1e-6 else OTHER_ROOT
+        elif iterations < k:
+            # Решатели прерываются раньше k итераций только на вырожденной
+            # матрице или нечисловом шаге
+            status = SINGULAR
+        else:
+            status = DIVERGED
+
+    row.update({
+        "Исход": status,
+        "Итераций": iterations,
+        "Время, с": time.perf_counter() - start,
+        "Невязка": float(np.linalg.norm(residual(x))) if x is not None else (norms[-1] if norms else None),
+    })
+    return row
+
+
+def _run_chunk(cases, method, k, timeout):
+    return [run_case(case, method, k, timeout) for case in cases]
+
+
+def _get_pool():
+    """Пул процессов переиспользуется между запусками и сессиями: запуск
+    интерпретаторов с NumPy и SciPy стоит дороже, чем сами небольшие решения.
+    Пул не закрывается, поэтому запуск одной сессии не отменяет задачи другой."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, а не fork: процесс сервера Streamlit многопоточный
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=get_context("spawn"))
+        return _pool
+
+
+def _map_limited(pool, solve, chunks, workers):
+    """Как pool.map, но в пуле одновременно не больше workers пачек этого запуска"""
+    chunks = iter(chunks)
+    pending = deque(pool.submit(solve, chunk) for chunk in islice(chunks, workers))
+    while pending:
+        result = pending.popleft().result()
+        for chunk in chunks:
+            pending.append(pool.submit(solve, chunk))
+            break
+        yield result
+
+
+def run_study(cases, method="banded", k=200, timeout=None, workers=None, progress=None):
+    """Решает все случаи в workers процессах общего пула (по умолчанию и не
+    больше MAX_WORKERS).
+
+    Случаи отправляются пачками, чтобы накладные расходы на передачу между
+    процессами не превышали время решений. Плотный метод пропускает n > DENSE_LIMIT.
+    Возвращает список строк; progress получает долю выполненных случаев.
+    """
+    if method == "dense":
+        cases = [case for case in cases if case["n"] <= DENSE_LIMIT]
+    workers = min(workers or MAX_WORKERS, MAX_WORKERS)
+    # Примерно по четыре пачки на процесс — для равномерной загрузки
+    chunk = max(1, len(cases) // (4 * workers))
+    chunks = [cases[i:i + chunk] for i in range(0, len(cases), chunk)]
+
+    solve = partial(_run_chunk, method=method, k=k, timeout=timeout)
+    results = map(solve, chunks) if workers == 1 else _map_limited(_get_pool(), solve, chunks, workers)
+    rows = []
+    for part in results:
+        rows.extend(part)
+        if progress is not None:
+            progress(len(rows) / max(len(cases), 1))
+    return rows
+
+
+def summarize(rows):
+    """Сводка по (n, ε, σ): доля сходимости к x = 1, медиана итераций, время"""
+    df = pd.DataFrame(rows)
+    grouped = df.groupby(["n", "eps", "sigma"])
+    return grouped.agg(**{
+        "Случаев": ("Исход", "size"),
+        "Доля сходимости к x = 1": ("Исход", lambda s: (s == CONVERGED).mean()),
+        "Другое решение": ("Исход", lambda s: (s == OTHER_ROOT).sum()),
+        "Не сошлось": ("Исход", lambda s: (s == DIVERGED).sum()),
+        "Вырожденная матрица": ("Исход", lambda s: (s == SINGULAR).sum()),
+        "Тайм-аут": ("Исход", lambda s: (s == TIMEOUT).sum()),
+        "Медиана итераций": ("Итераций", "median"),
+        "Среднее время, с": ("Время, с", "mean"),
+    }).reset_index()
@@ -0,0 +1,137 @@
+"""Файлы данных страниц: каталог на сервере и временные файлы сессий.
+
+Со страниц открываются только файлы из DATA_DIR (переменная окружения
+STREAMLIT_DATA_DIR, по умолчанию dataset/ в корне проекта). Путь
+проверяется после realpath, поэтому выйти из каталога через «..» или
+символическую ссылку нельзя. Загрузки и результаты лежат во временных
+каталогах: файлы старше TTL_SECONDS удаляются, объём каталога ограничен.
+
+session_dir, save_upload и server_file — общие для страниц части выбора
+файла: временный каталог сессии, копирование загрузки на диск и выбор
+файла из DATA_DIR.
+"""
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import streamlit as st
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.environ.get("STREAMLIT_DATA_DIR", os.path.join(ROOT, "dataset"))
+
+TTL_SECONDS = 3600
+MAX_BYTES = 2 * 1024**3
+
+
+def data_files(extensions=None):
+    """Имена файлов в DATA_DIR (без подкаталогов), при необходимости по расширениям"""
+    try:
+        names = sorted(os.listdir(DATA_DIR))
+    except OSError:
+        return []
+    return [
+        name for name in names
+        if os.path.isfile(os.path.join(DATA_DIR, name))
+        and (extensions is None or name.lower().endswith(tuple(extensions)))
+    ]
+
+
+def resolve(name):
+    """Полный путь к файлу name из DATA_DIR; ValueError, если он вне каталога"""
+    base = os.path.realpath(DATA_DIR)
+    path = os.path.realpath(os.path.join(base, name))
+    if os.path.commonpath([base, path]) != base or not os.path.isfile(path):
+        raise ValueError(f"Файл {name!r} не найден в каталоге данных")
+    return path
+
+
+def temp_dir(name):
+    """Общий для сессий временный каталог streamlit_<name>"""
+    path = os.path.join(tempfile.gettempdir(), f"streamlit_{name}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def prune(directory, keep=None, ttl=TTL_SECONDS, max_bytes=MAX_BYTES):
+    """Удаляет файлы старше ttl секунд, затем самые старые, пока объём больше max_bytes.
+
+    Файлы, в имени которых есть подстрока keep (файлы текущей сессии),
+    не удаляются. Открытые через memmap файлы в Linux остаются доступны
+    читающей сессии и после удаления.
+    """
+    files = []
+    for entry in os.scandir(directory):
+        if not entry.is_file() or (keep and keep in entry.name):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+    now = time.time()
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        if now - mtime <= ttl and total <= max_bytes:
+            break
+        remove(path)
+        total -= size
+
+
+def session_dir(name, state_key):
+    """Временный каталог name и идентификатор сессии из st.session_state[state_key].
+
+    Заодно удаляет устаревшие файлы других сессий. Возвращает (каталог, идентификатор).
+    """
+    directory = temp_dir(name)
+    session = st.session_state.setdefault(state_key, uuid.uuid4().hex)
+    prune(directory, keep=session)
+    return directory, session
+
+
+def save_upload(uploaded, directory, session, state_key, derived=(), chunk_size=1 << 20):
+    """Копирует загруженный файл блоками в directory/upload_<session><расширение>.
+
+    Копирование выполняется только для новой загрузки: прежняя загрузка
+    сессии и файлы derived, полученные из неё, удаляются. Возвращает
+    (путь, новая ли загрузка).
+    """
+    suffix = os.path.splitext(os.path.basename(uploaded.name))[1].lower()
+    if not suffix[1:].isalnum():
+        suffix = ""
+    path = os.path.join(directory, f"upload_{session}{suffix}")
+    previous = st.session_state.get(state_key)
+    if previous is not None and previous[0] == uploaded.file_id:
+        return path, False
+    if previous is not None:
+        remove(previous[1])
+    remove(path, *derived)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(uploaded, out, chunk_size)
+    st.session_state[state_key] = (uploaded.file_id, path)
+    return path, True
+
+
+def server_file(label, extensions=None):
+    """Выбор файла из DATA_DIR; возвращает полный путь или None с сообщением на странице"""
+    # Только файлы из каталога данных сервера, а не произвольный путь
+    files = data_files(extensions)
+    if not files:
+        kinds = f"файлов {', '.join(extensions)}" if extensions else "файлов"
+        st.info(f"В каталоге данных сервера нет {kinds} (задаётся переменной окружения STREAMLIT_DATA_DIR).")
+        return None
+    try:
+        return resolve(st.selectbox(label, files))
+    except ValueError as e:
+        st.error(str(e))
+        return None
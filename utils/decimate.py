@@ -0,0 +1,151 @@
+"""Прореживание рядов перед отрисовкой.
+
+Ряд сокращается до бюджета точек порядка ширины графика в пикселях.
+Метод min-max оставляет в каждом интервале минимум и максимум, поэтому
+пики не теряются. LTTB (Largest Triangle Three Buckets) оставляет по одной
+точке на интервал, сохраняющей форму кривой. Оба метода читают ряд
+интервалами и работают с memmap без загрузки его в память.
+"""
+import numpy as np
+import pandas as pd
+
+# Две точки (минимум и максимум) на столбец пикселей графика шириной ~1000 px
+DEFAULT_POINTS = 2000
+
+# Сколько отсчётов обрабатывается за раз при поиске минимумов и максимумов
+BLOCK_SIZE = 1 << 22
+
+
+def minmax_indices(y, n_out=DEFAULT_POINTS):
+    """Индексы минимума и максимума в каждом из n_out // 2 интервалов, по возрастанию"""
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return np.arange(n)
+    size = -(-n // buckets)
+    full = n // size
+    per_block = max(BLOCK_SIZE // size, 1)
+
+    parts = []
+    for first in range(0, full, per_block):
+        last = min(first + per_block, full)
+        block = np.asarray(y[first * size:last * size]).reshape(last - first, size)
+        offsets = np.arange(first, last)[:, None] * size
+        parts.append(np.sort(np.column_stack([block.argmin(axis=1), block.argmax(axis=1)]) + offsets, axis=1))
+    if full * size < n:
+        tail = np.asarray(y[full * size:])
+        parts.append(np.sort([[tail.argmin(), tail.argmax()]]) + full * size)
+    idx = np.concatenate(parts).ravel()
+    # Минимум и максимум могут совпасть (постоянный интервал)
+    return idx[np.concatenate([[True], np.diff(idx) != 0])]
+
+
+def lttb_indices(y, n_out=DEFAULT_POINTS, x=None):
+    """Индексы точек по алгоритму Largest Triangle Three Buckets.
+
+    Первая и последняя точки сохраняются, из каждого промежуточного
+    интервала берётся точка, образующая наибольший треугольник с уже
+    выбранной точкой и средним следующего интервала.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    def xs(lo, hi):
+        return np.arange(lo, hi, dtype=float) if x is None else np.asarray(x[lo:hi], dtype=float)
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = xs(hi, edges[i + 2]).mean(), np.asarray(y[hi:edges[i + 2]], dtype=float).mean()
+        else:
+            next_x, next_y = xs(n - 1, n)[0], float(y[n - 1])
+        ax_, ay = xs(a, a + 1)[0], float(y[a])
+        area = np.abs((ax_ - next_x) * (np.asarray(y[lo:hi], dtype=float) - ay) - (ax_ - xs(lo, hi)) * (next_y - ay))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+
+def decimate(y, x=None, n_out=DEFAULT_POINTS, method="minmax"):
+    """Прореженный ряд: возвращает (x, y, dropped).
+
+    Если x не задан, им служат номера отсчётов. dropped — число отброшенных точек.
+    """
+    # Для memmap np.asarray не копирует данные
+    y = np.asarray(y)
+    n = len(y)
+    if n <= n_out:
+        return (np.arange(n) if x is None else np.asarray(x)), y, 0
+    # Без x номера отсчётов — это сами выбранные индексы: полный arange
+    # длины ряда не создаётся
+    x = None if x is None else np.asarray(x)
+    if method == "minmax":
+        idx = minmax_indices(y, n_out)
+    else:
+        idx = lttb_indices(y, n_out, x)
+    return (idx if x is None else x[idx]), y[idx], n - len(idx)
+
+
+def frame(data, n_out=DEFAULT_POINTS, method="minmax"):
+    """Прореживание таблицы для st.line_chart и других встроенных графиков.
+
+    Сохраняются строки, выбранные для любого из числовых столбцов, индекс
+    (ось x графика) не меняется. Возвращает (DataFrame, dropped).
+    """
+    df = pd.DataFrame(data)
+    if len(df) <= n_out:
+        return df, 0
+    columns = df.select_dtypes("number").columns
+    # Бюджет делится между столбцами, чтобы итог оставался в пределах n_out
+    per_column = max(n_out // max(len(columns), 1), 4)
+    keep = set()
+    for column in columns:
+        values = df[column].to_numpy(dtype=float)
+        idx = minmax_indices(values, per_column) if method == "minmax" else lttb_indices(values, per_column)
+        keep.update(idx.tolist())
+    rows = np.sort(np.fromiter(keep, dtype=np.int64))
+    return df.iloc[rows], len(df) - len(rows)
+
+
+class DecimatingAxes:
+    """Обёртка над осями Matplotlib, прореживающая длинные ряды в plot и fill_between.
+
+    Остальные методы передаются осям без изменений. В dropped накапливается
+    число отброшенных точек.
+    """
+
+    def __init__(self, ax, n_out=DEFAULT_POINTS, method="minmax"):
+        self._ax = ax
+        self.n_out = n_out
+        self.method = method
+        self.dropped = 0
+
+    def __getattr__(self, name):
+        return getattr(self._ax, name)
+
+    def _series(self, x, y):
+        x, y, dropped = decimate(y, x, self.n_out, self.method)
+        self.dropped += dropped
+        return x, y
+
+    def plot(self, *args, **kwargs):
+        # Поддерживаются формы plot(y), plot(y, fmt), plot(x, y), plot(x, y, fmt)
+        arrays = [a for a in args if not isinstance(a, str)]
+        fmt = [a for a in args if isinstance(a, str)]
+        if len(arrays) == 1 and np.ndim(arrays[0]) == 1:
+            return self._ax.plot(*self._series(None, arrays[0]), *fmt, **kwargs)
+        if len(arrays) == 2 and np.ndim(arrays[1]) == 1 and len(fmt) <= 1 and (not fmt or args[-1] == fmt[0]):
+            return self._ax.plot(*self._series(arrays[0], arrays[1]), *fmt, **kwargs)
+        return self._ax.plot(*args, **kwargs)
+
+    def fill_between(self, x, y1, y2=0, **kwargs):
+        if np.ndim(y2) == 0 and len(y1) > self.n_out:
+            idx = minmax_indices(y1, self.n_out)
+            self.dropped += len(y1) - len(idx)
+            x, y1 = np.asarray(x)[idx], np.asarray(y1)[idx]
+        return self._ax.fill_between(x, y1, y2, **kwargs)
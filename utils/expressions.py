@@ -0,0 +1,97 @@
+"""Безопасный разбор пользовательских формул в векторные функции NumPy."""
+import ast
+from functools import lru_cache
+
+import numpy as np
+
+FUNCTIONS = {
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "arcsin": np.arcsin, "arccos": np.arccos, "arctan": np.arctan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "exp": np.exp, "log": np.log, "ln": np.log, "log10": np.log10, "log2": np.log2,
+    "sqrt": np.sqrt, "abs": np.abs, "sign": np.sign,
+}
+
+CONSTANTS = {"pi": np.pi, "e": np.e}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.UAdd, ast.USub,
+)
+
+
+class ExpressionError(ValueError):
+    """Формула не разобрана или содержит недопустимые конструкции"""
+
+
+# Ошибки вычисления формулы, которые превращаются в ExpressionError
+_EVAL_ERRORS = (TypeError, FloatingPointError, ZeroDivisionError)
+
+
+def _validate(tree, variables):
+    """Проверяет дерево формулы и приводит числа в нём к float.
+
+    Целые Python неограниченной длины сделали бы 9^9^9 вычислением на
+    минуты с удержанием GIL; у float степень сразу переполняется.
+    """
+    called = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ExpressionError(f"Недопустимая конструкция в формуле: {type(node).__name__}")
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ExpressionError(f"Недопустимая константа: {node.value!r}")
+            try:
+                node.value = float(node.value)
+            except OverflowError:
+                raise ExpressionError("Слишком большое число в формуле") from None
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+                raise ExpressionError(f"Неизвестная функция: {ast.unparse(node.func)}")
+            if node.keywords or len(node.args) != 1:
+                raise ExpressionError(f"Функция {node.func.id} принимает ровно один аргумент")
+        if isinstance(node, ast.Name) and node.id not in (*variables, *FUNCTIONS, *CONSTANTS):
+            raise ExpressionError(f"Неизвестное имя: {node.id}")
+        if isinstance(node, ast.Name) and node.id in FUNCTIONS and id(node) not in called:
+            raise ExpressionError(f"Функция {node.id} указана без аргумента, например {node.id}(x)")
+
+
+@lru_cache(maxsize=128)
+def compile_expression(text, variable="x"):
+    """Разбирает формулу один раз и возвращает векторную функцию f(x).
+
+    Допускаются числа, переменная, константы pi и e, арифметика (^ — степень)
+    и функции из FUNCTIONS. Функция принимает и число, и массив NumPy:
+    для числа возвращает float, для массива — массив той же формы.
+    Если variable — кортеж имён, например ("x", "p"), функция принимает
+    столько же аргументов, и массивы согласуются по правилам broadcasting.
+    Ошибки вычисления (например, переполнение в числах формулы) бросают
+    ExpressionError; формула пробно вычисляется в единице, чтобы такие
+    ошибки обнаруживались сразу. Результат кэшируется по тексту формулы.
+    """
+    variables = (variable,) if isinstance(variable, str) else tuple(variable)
+    try:
+        tree = ast.parse(text.replace("^", "**").strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Синтаксическая ошибка в формуле: {e.msg}") from None
+    _validate(tree, variables)
+
+    code = compile(tree, "<formula>", "eval")
+    namespace = {"__builtins__": {}, **FUNCTIONS, **CONSTANTS}
+
+    def func(*args):
+        args = [np.asarray(a, dtype=float) for a in args]
+        try:
+            with np.errstate(all="ignore"):
+                result = eval(code, namespace, dict(zip(variables, args)))
+        except OverflowError:
+            raise ExpressionError("Ошибка вычисления формулы: переполнение, число слишком велико") from None
+        except _EVAL_ERRORS as e:
+            raise ExpressionError(f"Ошибка вычисления формулы: {e}") from None
+        result = np.asarray(result, dtype=float) + np.zeros(np.broadcast_shapes(*(a.shape for a in args)))
+        return float(result) if result.ndim == 0 else result
+
+    func(*[1.0] * len(variables))
+    func.expression = text
+    return func
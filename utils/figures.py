@@ -0,0 +1,112 @@
+"""Общий кэш отрисованных графиков Matplotlib.
+
+График рисуется один раз для набора параметров и хранится как PNG или SVG.
+Фигуры создаются без pyplot: они не попадают в глобальный список фигур,
+не мешают друг другу в параллельных сессиях и закрываются сразу после
+сохранения.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.figure import Figure
+
+from utils import instrument
+from utils.decimate import DEFAULT_POINTS, DecimatingAxes
+
+
+def array_key(*arrays):
+    """Короткий ключ для массивов данных графика"""
+    digest = hashlib.sha1()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        digest.update(str((a.dtype, a.shape)).encode())
+        digest.update(a.tobytes())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """LRU-кэш изображений графиков с ограничением по числу записей и памяти"""
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {"Записей": len(self._data), "Байт": self.nbytes, "Попаданий": self.hits, "Промахов": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def render(self, key, draw, figsize=(6.4, 4.8), fmt="png", dpi=150, max_points=DEFAULT_POINTS):
+        """Изображение графика для ключа key.
+
+        При промахе создаётся фигура с одной осью, draw(ax) рисует на ней,
+        результат сохраняется в fmt ("png" или "svg"). Ключ должен включать
+        всё, от чего зависит рисунок.
+        """
+        return self.render_info(key, draw, figsize, fmt, dpi, max_points)[0]
+
+    def render_info(self, key, draw, figsize=(6.4, 4.8), fmt="png", dpi=150, max_points=DEFAULT_POINTS):
+        """То же, что render, но возвращает (изображение, число отброшенных точек).
+
+        Ряды длиннее max_points в ax.plot и ax.fill_between прореживаются
+        методом min-max до отрисовки (см. utils.decimate).
+        """
+        key = (key, figsize, fmt, dpi, max_points)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        fig = Figure(figsize=figsize)
+        try:
+            with instrument.stage("Отрисовка графика"):
+                ax = DecimatingAxes(fig.subplots(), max_points)
+                draw(ax)
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches="tight")
+        finally:
+            # На случай, если draw всё же обратился к pyplot
+            plt.close(fig)
+        image = buffer.getvalue()
+        if fmt == "svg":
+            image = image.decode("utf-8")
+
+        with self._lock:
+            if key not in self._data:
+                self._data[key] = (image, ax.dropped)
+                self.nbytes += len(image)
+            # Вытесняем самые давно использованные изображения
+            while len(self._data) > 1 and (len(self._data) > self.max_entries or self.nbytes > self.max_bytes):
+                _, (old, _) = self._data.popitem(last=False)
+                self.nbytes -= len(old)
+        return image, ax.dropped
+
+
+# Один кэш на процесс сервера, общий для всех страниц и сессий
+FIGURES = FigureCache()
+instrument.register_cache("Графики Matplotlib", FIGURES.stats)
+
+
+def render(key, draw, figsize=(6.4, 4.8), fmt="png", dpi=150, max_points=DEFAULT_POINTS):
+    return FIGURES.render(key, draw, figsize, fmt, dpi, max_points)
+
+
+def render_info(key, draw, figsize=(6.4, 4.8), fmt="png", dpi=150, max_points=DEFAULT_POINTS):
+    return FIGURES.render_info(key, draw, figsize, fmt, dpi, max_points)
@@ -0,0 +1,144 @@
+"""Замеры времени этапов страниц и профилирование одного прогона.
+
+Страница вызывает start_page в начале и end_page в конце скрипта, а
+дорогие этапы оборачивает в stage. Прогон страницы Streamlit идёт в
+отдельном потоке, поэтому текущая страница хранится в thread-local.
+Для каждой пары (страница, этап) держится скользящее окно последних
+WINDOW замеров, по которому считаются перцентили.
+"""
+import cProfile
+import io
+import pstats
+import runpy
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+WINDOW = 200
+
+# Этап, под которым записывается весь прогон страницы
+WHOLE_RUN = "Прогон целиком"
+
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+_caches = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def start_page(name):
+    """Отметить начало прогона страницы name в текущем потоке"""
+    _local.page = name
+    _local.started = time.perf_counter()
+
+
+def end_page():
+    """Записать время прогона целиком. Прогоны, прерванные st.stop, не попадают"""
+    started = getattr(_local, "started", None)
+    if started is not None:
+        record(WHOLE_RUN, time.perf_counter() - started)
+        _local.started = None
+
+
+def current_page():
+    return getattr(_local, "page", None)
+
+
+def record(stage_name, seconds, page=None):
+    """Добавить замер этапа; страница по умолчанию — текущая в этом потоке.
+
+    Во время profile_script замеры не записываются: прогон под профилировщиком
+    медленнее обычного и исказил бы перцентили страницы.
+    """
+    if getattr(_local, "muted", False):
+        return
+    page = page or current_page() or "—"
+    with _lock:
+        _samples[(page, stage_name)].append(seconds)
+
+
+@contextmanager
+def stage(name, page=None):
+    """Замерить время блока with как этап name. Этапы с исключением не записываются"""
+    started = time.perf_counter()
+    yield
+    record(name, time.perf_counter() - started, page)
+
+
+def register_cache(name, stats):
+    """Зарегистрировать кэш: stats() возвращает словарь с «Попаданий» и «Промахов»"""
+    with _lock:
+        _caches[name] = stats
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+
+
+def latency_rows():
+    """Перцентили времени (в мс) по страницам и этапам"""
+    with _lock:
+        items = [(key, np.array(values)) for key, values in _samples.items()]
+    rows = []
+    for (page, stage_name), values in sorted(items):
+        p50, p90, p99 = np.percentile(values, [50, 90, 99]) * 1000
+        rows.append({
+            "Страница": page,
+            "Этап": stage_name,
+            "Замеров": len(values),
+            "p50, мс": p50,
+            "p90, мс": p90,
+            "p99, мс": p99,
+            "Макс., мс": values.max() * 1000,
+        })
+    return rows
+
+
+def cache_rows():
+    """Доля попаданий и прочая статистика зарегистрированных кэшей"""
+    with _lock:
+        caches = list(_caches.items())
+    rows = []
+    for name, stats in caches:
+        info = stats()
+        calls = info["Попаданий"] + info["Промахов"]
+        rows.append({"Кэш": name, **info, "Доля попаданий": info["Попаданий"] / calls if calls else None})
+    return rows
+
+
+def profile_script(path, limit=40):
+    """Выполнить скрипт страницы под cProfile; возвращает строки таблицы функций.
+
+    st.stop внутри страницы завершает прогон как обычно, остальные исключения
+    пробрасываются. Замеры профилируемой страницы не записываются, текущая
+    страница потока восстанавливается.
+    """
+    saved = dict(_local.__dict__)
+    _local.muted = True
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except BaseException as e:
+        # StopException от st.stop — не ошибка; остальное (в том числе rerun) пробрасываем
+        if type(e).__name__ != "StopException":
+            raise
+    finally:
+        profiler.disable()
+        _local.__dict__.clear()
+        _local.__dict__.update(saved)
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (_, calls, own, total, _) in stats.stats.items():
+        rows.append({
+            "Функция": f"{function} ({filename}:{line})",
+            "Вызовов": calls,
+            "Собственное время, с": own,
+            "Общее время, с": total,
+        })
+    rows.sort(key=lambda row: row["Общее время, с"], reverse=True)
+    return rows[:limit]
@@ -0,0 +1,137 @@
+"""Сплайн-интерполяция больших наборов точек.
+
+Узлы читаются из файла через memmap, сплайн строится один раз для данных
+(ключ — хэш содержимого), а вычисление на больших массивах запросов идёт
+блоками в пуле потоков: кусочно-полиномиальные сплайны SciPy вычисляются
+в скомпилированном коде, и блоки обрабатываются независимо.
+"""
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import interpolate
+
+CHUNK_SIZE = 1 << 20
+
+KINDS = {
+    "cubic": "Кубический сплайн",
+    "pchip": "PCHIP (монотонный кубический)",
+    "akima": "Сплайн Акимы",
+    "linear": "Линейная",
+}
+
+
+def open_samples(path):
+    """Узлы (x, y) из файла.
+
+    .npy формы (n, 2) открывается через memmap, CSV с двумя числовыми
+    столбцами читается целиком (для небольших файлов).
+    """
+    if str(path).endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+        if data.ndim != 2 or data.shape[1] != 2:
+            raise ValueError(f"Ожидается массив формы (n, 2), получен {data.shape}")
+        return data[:, 0], data[:, 1]
+    table = pd.read_csv(path).select_dtypes("number")
+    if table.shape[1] < 2:
+        raise ValueError("В CSV нужны два числовых столбца: x и y")
+    return table.iloc[:, 0].to_numpy(float), table.iloc[:, 1].to_numpy(float)
+
+
+def synthetic_samples(path, n, noise=0.01, seed=0, chunk_size=CHUNK_SIZE):
+    """Записывает в .npy n узлов sin(x) на [0, 10] с небольшим шумом"""
+    rng = np.random.default_rng(seed)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(n, 2))
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        x = 10 * np.arange(start, stop) / max(n - 1, 1)
+        out[start:stop, 0] = x
+        out[start:stop, 1] = np.sin(x) + noise * rng.standard_normal(stop - start)
+    out.flush()
+    del out
+    return open_samples(path)
+
+
+def data_digest(x, y, chunk_size=CHUNK_SIZE):
+    """SHA-256 узлов, считается блоками — подходит для memmap"""
+    digest = hashlib.sha256()
+    for start in range(0, len(x), chunk_size):
+        digest.update(np.ascontiguousarray(x[start:start + chunk_size], dtype=np.float64).tobytes())
+        digest.update(np.ascontiguousarray(y[start:start + chunk_size], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def fit_spline(x, y, kind="cubic"):
+    """Строит интерполянт; возвращает (spline, stats).
+
+    Если x не возрастает строго, узлы сортируются, а повторяющиеся x
+    отбрасываются (остаётся первый). stats — время построения, число узлов
+    и объём коэффициентов.
+    """
+    start = time.perf_counter()
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    dropped = 0
+    if np.any(np.diff(x) <= 0):
+        x, first = np.unique(x, return_index=True)
+        dropped = len(y) - len(first)
+        y = y[first]
+    if kind == "cubic":
+        spline = interpolate.CubicSpline(x, y)
+    elif kind == "pchip":
+        spline = interpolate.PchipInterpolator(x, y)
+    elif kind == "akima":
+        spline = interpolate.Akima1DInterpolator(x, y)
+    else:
+        spline = interpolate.make_interp_spline(x, y, k=1)
+    breakpoints = spline.x if isinstance(spline, interpolate.PPoly) else spline.t
+    stats = {
+        "Узлов": len(x),
+        "Отброшено повторов x": dropped,
+        "Построение, с": time.perf_counter() - start,
+        "Коэффициенты, МБ": (spline.c.nbytes + breakpoints.nbytes) / 2**20,
+    }
+    return spline, stats
+
+
+def domain(spline):
+    """Отрезок, на котором заданы узлы сплайна"""
+    breakpoints = spline.x if isinstance(spline, interpolate.PPoly) else spline.t
+    return float(breakpoints[0]), float(breakpoints[-1])
+
+
+def evaluate_grid(spline, lo, hi, count, out_path, chunk_size=CHUNK_SIZE, workers=None, progress=None):
+    """Значения сплайна в count равномерных точках [lo, hi], результат — в .npy.
+
+    Точки блока генерируются внутри задачи, так что в памяти одновременно
+    не больше workers блоков. Возвращает (values, stats): values — memmap,
+    stats — время и число точек в секунду.
+    """
+    workers = workers or os.cpu_count() or 1
+    out = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float64, shape=(count,))
+    step = (hi - lo) / max(count - 1, 1)
+
+    def task(start):
+        stop = min(start + chunk_size, count)
+        out[start:stop] = spline(lo + step * np.arange(start, stop))
+        return stop - start
+
+    started = time.perf_counter()
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for size in pool.map(task, range(0, count, chunk_size)):
+            done += size
+            if progress is not None:
+                progress(done / count)
+    out.flush()
+    elapsed = time.perf_counter() - started
+    stats = {
+        "Точек": count,
+        "Потоков": workers,
+        "Вычисление, с": elapsed,
+        "Точек в секунду": count / elapsed if elapsed > 0 else float("inf"),
+    }
+    return out, stats
@@ -0,0 +1,128 @@
+"""Сжатое вычисление разреженной численной матрицы Якоби через раскраску столбцов."""
+import copy
+
+import numpy as np
+from scipy import sparse
+
+
+def banded_pattern(n, lower=1, upper=1):
+    """Шаблон ленточной матрицы: J[i, j] != 0 при -lower <= j - i <= upper"""
+    offsets = list(range(-lower, upper + 1))
+    return sparse.diags([np.ones(n - abs(k), dtype=bool) for k in offsets], offsets,
+                        shape=(n, n), format="csc", dtype=bool)
+
+
+def detect_sparsity(f, x, h=1e-8, F_x=None):
+    """Определяет шаблон заполнения по численной матрице Якоби в точке x.
+
+    Требует n вычислений f, поэтому подходит для небольших n или для
+    однократного запуска с последующим сохранением шаблона. Нули,
+    случайно возникшие в конкретной точке, пропускаются — точку лучше
+    брать случайной.
+    """
+    n = len(x)
+    if F_x is None:
+        F_x = f(x)
+    rows, cols = [], []
+    for j in range(n):
+        x_h = x.copy()
+        x_h[j] += h
+        nz = np.flatnonzero(f(x_h) != F_x)
+        rows.append(nz)
+        cols.append(np.full(nz.size, j))
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    return sparse.csc_matrix((np.ones(rows.size, dtype=bool), (rows, cols)), shape=(len(F_x), n))
+
+
+def color_columns(pattern):
+    """Раскраска столбцов: столбцы одного цвета не имеют общих ненулевых строк.
+
+    Для целиком заполненной ленты цвет равен j mod (ширина ленты) — это
+    оптимально и не требует перебора. Иначе используется жадная раскраска.
+    Возвращает массив цветов длины n.
+    """
+    pattern = sparse.csc_matrix(pattern, dtype=bool)
+    n = pattern.shape[1]
+    coo = pattern.tocoo()
+    diff = coo.col - coo.row
+    if diff.size and pattern.shape[0] == n:
+        upper, lower = int(diff.max()), int(-diff.min())
+        # Число элементов заполненной ленты: по n - |k| на каждую диагональ k
+        offsets = np.arange(-max(lower, 0), max(upper, 0) + 1)
+        if pattern.nnz == int(np.maximum(n - np.abs(offsets), 0).sum()):
+            return np.arange(n) % (upper + lower + 1)
+
+    rows_of = pattern  # столбцы -> строки
+    cols_of = pattern.tocsr()  # строки -> столбцы
+    colors = np.full(n, -1)
+    for j in range(n):
+        rows = rows_of.indices[rows_of.indptr[j]:rows_of.indptr[j + 1]]
+        neighbours = np.concatenate([cols_of.indices[cols_of.indptr[r]:cols_of.indptr[r + 1]] for r in rows]) \
+            if rows.size else np.empty(0, dtype=int)
+        used = set(colors[neighbours][colors[neighbours] >= 0].tolist())
+        color = 0
+        while color in used:
+            color += 1
+        colors[j] = color
+    return colors
+
+
+class SparseJacobian:
+    """Численная матрица Якоби по известному шаблону заполнения.
+
+    Столбцы одного цвета возмущаются одновременно, поэтому на матрицу
+    уходит по одному вычислению f на цвет вместо одного на столбец.
+    Счётчики evaluations и saved накапливаются между вызовами.
+    """
+
+    def __init__(self, pattern, h=1e-8):
+        self.pattern = sparse.csc_matrix(pattern, dtype=bool)
+        self.pattern.sort_indices()
+        self.h = h
+        self.colors = color_columns(self.pattern)
+        self.n_colors = int(self.colors.max()) + 1 if self.colors.size else 0
+
+        # Ширина ленты: по ней решатель выбирает ленточное или общее разреженное решение
+        coo = self.pattern.tocoo()
+        self.lower = int(max((coo.row - coo.col).max(initial=0), 0))
+        self.upper = int(max((coo.col - coo.row).max(initial=0), 0))
+
+        # Для каждого ненулевого элемента: его строка и цвет его столбца
+        indptr = self.pattern.indptr
+        nnz_cols = np.repeat(np.arange(self.pattern.shape[1]), np.diff(indptr))
+        self._rows = self.pattern.indices
+        self._groups = [np.flatnonzero(self.colors[nnz_cols] == c) for c in range(self.n_colors)]
+        self._columns = [np.flatnonzero(self.colors == c) for c in range(self.n_colors)]
+        self._band_rows = self.upper + self._rows - nnz_cols
+        self._band_cols = nnz_cols
+
+        self.evaluations = 0
+        self.saved = 0
+
+    def fresh(self):
+        """Копия с общими шаблоном и раскраской и нулевыми счётчиками"""
+        jacobian = copy.copy(self)
+        jacobian.evaluations = 0
+        jacobian.saved = 0
+        return jacobian
+
+    def __call__(self, f, x, F_x=None):
+        if F_x is None:
+            F_x = f(x)
+            self.evaluations += 1
+        values = np.zeros(self._rows.size)
+        for columns, group in zip(self._columns, self._groups):
+            x_h = x.copy()
+            x_h[columns] += self.h
+            d = (f(x_h) - F_x) / self.h
+            values[group] = d[self._rows[group]]
+        self.evaluations += self.n_colors
+        self.saved += self.pattern.shape[1] - self.n_colors
+        return sparse.csc_matrix((values, self.pattern.indices, self.pattern.indptr), shape=self.pattern.shape)
+
+    def to_banded(self, J):
+        """Перекладывает матрицу, вычисленную этим объектом, в ленточный
+        формат scipy.linalg.solve_banded"""
+        ab = np.zeros((self.lower + self.upper + 1, J.shape[1]))
+        ab[self._band_rows, self._band_cols] = J.data
+        return ab
@@ -0,0 +1,304 @@
+"""Метод Ньютона для системы из задания 4.2."""
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.linalg import solve_banded
+from scipy.linalg.lapack import dgbtrf, dgbtrs
+from scipy.sparse.linalg import splu, spsolve
+
+from utils.jacobian import SparseJacobian, banded_pattern
+
+# Максимальная ширина ленты, при которой разреженная матрица решается как ленточная
+MAX_BANDWIDTH = 64
+
+
+def residual_loop(x):
+    """Исходная версия F(x): поэлементный цикл Python"""
+    n = len(x)
+    F = np.zeros(n)
+    F[0] = (3 + 2 * x[0]) * x[0] - 2 * x[1] - 3
+    for i in range(1, n - 1):
+        F[i] = (3 + 2 * x[i]) * x[i] - x[i - 1] - 2 * x[i + 1] - 2
+    F[n - 1] = (3 + 2 * x[n - 1]) * x[n - 1] - x[n - 2] - 4
+    return F
+
+
+def residual(x):
+    """F(x) целиком на срезах NumPy"""
+    F = (3 + 2 * x) * x - 2
+    F[:-1] -= 2 * x[1:]
+    F[1:] -= x[:-1]
+    F[0] -= 1
+    F[-1] -= 2
+    return F
+
+
+def analytic_jacobian(x):
+    """Точная матрица Якоби системы: диагональ 3 + 4x, над ней -2, под ней -1"""
+    n = len(x)
+    return sparse.diags([np.full(n - 1, -1.0), 3 + 4 * x, np.full(n - 1, -2.0)], [-1, 0, 1], format="csc")
+
+
+def dense_jacobian(f, x, h=1e-8, F_x=None):
+    """Численная матрица Якоби n×n: по одному возмущению на каждую координату"""
+    n = len(x)
+    J = np.zeros((n, n))
+    if F_x is None:
+        F_x = f(x)
+    for i in range(n):
+        x_h = x.copy()
+        x_h[i] += h
+        F_x_h = f(x_h)
+        J[:, i] = (F_x_h - F_x) / h
+    return J
+
+
+def banded_jacobian(f, x, h=1e-8, F_x=None):
+    """Численная трёхдиагональная матрица Якоби в ленточном формате (3, n).
+
+    Уравнение i зависит только от x[i-1], x[i], x[i+1], поэтому координаты
+    с шагом 3 можно возмущать одновременно: хватает трёх вычислений F.
+    Формат совпадает с ожидаемым scipy.linalg.solve_banded при (1, 1):
+    ab[0, j] = J[j-1, j], ab[1, j] = J[j, j], ab[2, j] = J[j+1, j].
+    """
+    n = len(x)
+    ab = np.zeros((3, n))
+    if F_x is None:
+        F_x = f(x)
+    for shift in range(3):
+        cols = np.arange(shift, n, 3)
+        x_h = x.copy()
+        x_h[cols] += h
+        d = (f(x_h) - F_x) / h
+        ab[1, cols] = d[cols]
+        upper = cols[cols >= 1]
+        ab[0, upper] = d[upper - 1]
+        lower = cols[cols < n - 1]
+        ab[2, lower] = d[lower + 1]
+    return ab
+
+
+def newton_dense(x, eps, k, f=residual_loop, callback=None):
+    """Исходный метод Ньютона: плотная матрица Якоби и np.linalg.solve, O(n³).
+
+    callback(norm), если задан, вызывается с ‖F‖ на каждой итерации
+    (так же во всех решателях ниже); исключение из него прерывает решение.
+    """
+    norms = []
+    for i in range(k):
+        F = f(x)
+        norm = np.linalg.norm(F)
+        norms.append(norm)
+        if callback is not None:
+            callback(norm)
+        if norm < eps:
+            return x, i + 1, norms
+        J = dense_jacobian(f, x, F_x=F)
+        try:
+            dx = np.linalg.solve(J, -F)
+        except np.linalg.LinAlgError:
+            return None, i, norms
+        x += dx
+        if np.linalg.norm(dx) < eps:
+            return x, i + 1, norms
+    return None, k, norms
+
+
+def newton_banded(x, eps, k, f=residual, callback=None):
+    """Метод Ньютона с ленточной матрицей Якоби и ленточным решателем, O(n)"""
+    norms = []
+    for i in range(k):
+        F = f(x)
+        norm = np.linalg.norm(F)
+        norms.append(norm)
+        if callback is not None:
+            callback(norm)
+        if norm < eps:
+            return x, i + 1, norms
+        ab = banded_jacobian(f, x, F_x=F)
+        try:
+            dx = solve_banded((1, 1), ab, -F)
+        except np.linalg.LinAlgError:
+            return None, i, norms
+        x += dx
+        if np.linalg.norm(dx) < eps:
+            return x, i + 1, norms
+    return None, k, norms
+
+
+def newton_sparse(x, eps, k, f=residual, jacobian=None, callback=None):
+    """Метод Ньютона с разреженной численной матрицей Якоби (SparseJacobian).
+
+    Если jacobian не задан, используется трёхдиагональный шаблон системы 4.2.
+    Счётчики вычислений f остаются в jacobian.evaluations и jacobian.saved.
+    Для узкой ленты система решается solve_banded, иначе — разреженным LU.
+    """
+    if jacobian is None:
+        jacobian = SparseJacobian(banded_pattern(len(x)))
+    banded = jacobian.lower + jacobian.upper + 1 <= MAX_BANDWIDTH
+    norms = []
+    for i in range(k):
+        F = f(x)
+        norm = np.linalg.norm(F)
+        norms.append(norm)
+        if callback is not None:
+            callback(norm)
+        if norm < eps:
+            return x, i + 1, norms
+        J = jacobian(f, x, F_x=F)
+        try:
+            if banded:
+                dx = solve_banded((jacobian.lower, jacobian.upper), jacobian.to_banded(J), -F)
+            else:
+                dx = spsolve(J, -F)
+        except np.linalg.LinAlgError:
+            return None, i, norms
+        if not np.all(np.isfinite(dx)):
+            return None, i, norms
+        x += dx
+        if np.linalg.norm(dx) < eps:
+            return x, i + 1, norms
+    return None, k, norms
+
+
+def factorize(J, jacobian):
+    """LU-разложение разреженной матрицы Якоби; возвращает функцию решения.
+
+    Узкая лента раскладывается LAPACK gbtrf, остальное — SuperLU.
+    Разложение делается один раз и переиспользуется для многих правых частей.
+    """
+    kl, ku = jacobian.lower, jacobian.upper
+    if kl + ku + 1 <= MAX_BANDWIDTH:
+        ab = np.zeros((2 * kl + ku + 1, J.shape[1]))
+        ab[kl:] = jacobian.to_banded(J)
+        lu, piv, info = dgbtrf(ab, kl, ku)
+        if info > 0:
+            raise np.linalg.LinAlgError("Вырожденная матрица Якоби")
+
+        def solve(b):
+            x, info = dgbtrs(lu, kl, ku, b, piv)
+            return x
+        return solve
+    try:
+        return splu(J.tocsc()).solve
+    except RuntimeError as e:
+        raise np.linalg.LinAlgError(str(e)) from None
+
+
+# Стратегии пересчёта матрицы Якоби для newton_reuse
+STRATEGIES = {
+    "newton": "Ньютон (новая матрица на каждом шаге)",
+    "chord": "Хорд (замороженная матрица)",
+    "broyden": "Бройден (ранговые обновления)",
+}
+
+
+def newton_reuse(x, eps, k, f=residual, jacobian=None, strategy="chord", stall_ratio=0.5, max_updates=5,
+                 callback=None):
+    """Метод Ньютона с повторным использованием разложения матрицы Якоби.
+
+    strategy="newton" — матрица и разложение на каждой итерации;
+    "chord" — разложение замораживается и пересчитывается, только когда
+    сходимость застопорилась: ‖F‖ уменьшилась меньше, чем в 1 / stall_ratio раз;
+    "broyden" — между пересчётами обратная матрица уточняется ранговыми
+    обновлениями (хранятся пары векторов, не более max_updates).
+
+    Возвращает (x, iterations, norms, stats): stats — по строке на итерацию
+    с временем, числом вычислений f и признаком пересчёта матрицы.
+    """
+    if jacobian is None:
+        jacobian = SparseJacobian(banded_pattern(len(x)))
+    norms, stats = [], []
+    solve, updates = None, []
+    F = f(x)
+    evaluations = 1
+
+    def apply_inverse(v):
+        # H_{i+1} v = H_i v + u_i (s_i · H_i v), H_0 — обратная к разложенной матрице
+        z = solve(v)
+        for s, u in updates:
+            z = z + u * (s @ z)
+        return z
+
+    for i in range(k):
+        start = time.perf_counter()
+        norm = np.linalg.norm(F)
+        norms.append(norm)
+        if callback is not None:
+            callback(norm)
+        if norm < eps:
+            return x, i + 1, norms, stats
+
+        refresh = (
+            solve is None
+            or strategy == "newton"
+            or (len(norms) > 1 and norm > stall_ratio * norms[-2])
+            or len(updates) >= max_updates
+        )
+        if refresh:
+            before = jacobian.evaluations
+            try:
+                solve = factorize(jacobian(f, x, F_x=F), jacobian)
+            except np.linalg.LinAlgError:
+                return None, i, norms, stats
+            evaluations += jacobian.evaluations - before
+            updates = []
+
+        dx = -apply_inverse(F)
+        if not np.all(np.isfinite(dx)):
+            return None, i, norms, stats
+        x_new = x + dx
+        F_new = f(x_new)
+        evaluations += 1
+        accepted = refresh or np.linalg.norm(F_new) <= stall_ratio * norm
+
+        # Шаг по устаревшей матрице, ухудшивший невязку, отбрасывается:
+        # на следующей итерации ‖F‖ не изменится, и матрица будет пересчитана
+        if accepted:
+            if strategy == "broyden":
+                # «Хорошее» обновление Бройдена для обратной матрицы
+                Hy = apply_inverse(F_new - F)
+                denom = dx @ Hy
+                if denom != 0:
+                    updates.append((dx, (dx - Hy) / denom))
+            x, F = x_new, F_new
+
+        stats.append({
+            "Итерация": i + 1,
+            "‖F‖": norm,
+            "Время, с": time.perf_counter() - start,
+            "Вычислений F": evaluations,
+            "Пересчёт матрицы": refresh,
+            "Шаг принят": accepted,
+        })
+        evaluations = 0
+        if accepted and np.linalg.norm(dx) < eps:
+            norms.append(np.linalg.norm(F))
+            return x, i + 1, norms, stats
+    return None, k, norms, stats
+
+
+def compare_timings(sizes, dense_limit=1000, eps=1e-10, k=1000):
+    """Время плотного и ленточного решения для каждого n.
+
+    Плотный путь запускается только для n <= dense_limit. Возвращает
+    список строк таблицы (словарей).
+    """
+    rows = []
+    for n in sizes:
+        row = {"n": n}
+        for name, solver, limit in (("Плотная, с", newton_dense, dense_limit),
+                                    ("Ленточная, с", newton_banded, None)):
+            if limit is not None and n > limit:
+                row[name] = None
+                continue
+            start = time.perf_counter()
+            solver(np.zeros(n), eps, k)
+            row[name] = time.perf_counter() - start
+        if row["Плотная, с"] is not None:
+            row["Ускорение"] = row["Плотная, с"] / row["Ленточная, с"]
+        else:
+            row["Ускорение"] = None
+        rows.append(row)
+    return rows
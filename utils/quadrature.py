@@ -0,0 +1,134 @@
+"""Вычисление семейств интегралов ∫_a^b f(x, p) dx.
+
+Семейство задаётся массивами a, b и p (согласуются по правилам broadcasting):
+параметр, пробегающий тысячи значений, или много отрезков интегрирования.
+Квадратура Гаусса–Лежандра считает всё семейство одним вызовом f на
+массиве узлов, адаптивный вариант — scipy.integrate.quad_vec с векторной
+подынтегральной функцией. Цикл по quad оставлен как эталон.
+"""
+import time
+from functools import lru_cache
+
+import numpy as np
+from scipy import integrate
+
+# Сколько значений f вычисляется за один вызов в gauss_legendre
+BLOCK_SIZE = 1 << 20
+
+
+@lru_cache(maxsize=32)
+def legendre_nodes(order):
+    """Узлы и веса Гаусса–Лежандра на [-1, 1]"""
+    return np.polynomial.legendre.leggauss(order)
+
+
+def _family(a, b, params):
+    a, b, p = np.broadcast_arrays(np.asarray(a, float), np.asarray(b, float), np.asarray(params, float))
+    return a.ravel(), b.ravel(), p.ravel(), a.shape
+
+
+def gauss_legendre(f, a, b, params=0.0, order=32, panels=1):
+    """Составная квадратура Гаусса–Лежандра для всего семейства сразу.
+
+    Каждый отрезок делится на panels частей по order узлов; f(x, p)
+    вызывается на блоках из не более BLOCK_SIZE значений.
+    Возвращает (values, evaluations).
+    """
+    a, b, p, shape = _family(a, b, params)
+    t, w = legendre_nodes(order)
+    # Узлы и веса на [0, 1] для всех частей отрезка
+    h = 1 / panels
+    u = (np.arange(panels)[:, None] * h + h / 2 * (t + 1)).ravel()
+    wu = np.tile(w * h / 2, panels)
+
+    values = np.empty(len(a))
+    rows = max(BLOCK_SIZE // len(u), 1)
+    for start in range(0, len(a), rows):
+        part = slice(start, start + rows)
+        width = b[part] - a[part]
+        x = a[part, None] + width[:, None] * u
+        values[part] = (f(x, p[part, None]) @ wu) * width
+    return values.reshape(shape), len(a) * len(u)
+
+
+def adaptive(f, a, b, params=0.0, epsabs=1e-10, epsrel=1e-10, limit=200):
+    """Адаптивное интегрирование семейства через quad_vec.
+
+    Отрезки приводятся к [0, 1], и quad_vec дробит общий отрезок, пока
+    оценка погрешности всех интегралов сразу не станет меньше допуска.
+    Возвращает (values, error, evaluations).
+    """
+    a, b, p, shape = _family(a, b, params)
+    width = b - a
+
+    def g(u):
+        return width * f(a + width * u, p)
+
+    values, error, info = integrate.quad_vec(g, 0, 1, epsabs=epsabs, epsrel=epsrel, limit=limit, full_output=True)
+    return values.reshape(shape), error, info.neval * len(a)
+
+
+def quad_loop(f, a, b, params=0.0):
+    """Эталон: отдельный integrate.quad для каждого интеграла семейства.
+
+    Возвращает (values, evaluations).
+    """
+    a, b, p, shape = _family(a, b, params)
+    values = np.empty(len(a))
+    evaluations = 0
+    for i in range(len(a)):
+        values[i], _, info = integrate.quad(lambda x: f(x, p[i]), a[i], b[i], full_output=True)
+        evaluations += info["neval"]
+    return values.reshape(shape), evaluations
+
+
+def compare(f, a, b, params=0.0, order=32, panels=1, epsrel=1e-10, loop_limit=1000):
+    """Время и точность векторных методов относительно цикла по quad.
+
+    Цикл по quad считается не больше чем для loop_limit интегралов,
+    равномерно выбранных из семейства; на них же меряется погрешность, а время
+    для всего семейства пересчитывается пропорционально.
+    Возвращает (values, rows): values — словарь значений семейства по методам,
+    rows — строки таблицы сравнения.
+    """
+    a, b, p, shape = _family(a, b, params)
+    m = len(a)
+    sample = np.unique(np.linspace(0, m - 1, min(m, loop_limit)).round().astype(int))
+
+    start = time.perf_counter()
+    reference, loop_evaluations = quad_loop(f, a[sample], b[sample], p[sample])
+    loop_time = (time.perf_counter() - start) * m / len(sample)
+
+    results = {}
+    rows = [{
+        "Метод": "Цикл по quad" + (f" (оценка по {len(sample)} интегралам)" if len(sample) < m else ""),
+        "Время, с": loop_time,
+        "Вычислений f": loop_evaluations * m // len(sample),
+        "Макс. отклонение от quad": 0.0,
+    }]
+
+    start = time.perf_counter()
+    values, evaluations = gauss_legendre(f, a, b, p, order, panels)
+    elapsed = time.perf_counter() - start
+    results["gauss"] = values
+    rows.append({
+        "Метод": f"Гаусс–Лежандр, {panels} × {order} узлов",
+        "Время, с": elapsed,
+        "Вычислений f": evaluations,
+        "Макс. отклонение от quad": float(np.max(np.abs(values[sample] - reference))),
+    })
+
+    start = time.perf_counter()
+    values, _, evaluations = adaptive(f, a, b, p, epsrel=epsrel)
+    elapsed = time.perf_counter() - start
+    results["adaptive"] = values
+    rows.append({
+        "Метод": f"Адаптивный quad_vec, ε = {epsrel:.0e}",
+        "Время, с": elapsed,
+        "Вычислений f": evaluations,
+        "Макс. отклонение от quad": float(np.max(np.abs(values[sample] - reference))),
+    })
+
+    for row in rows:
+        row["Ускорение"] = loop_time / row["Время, с"] if row["Время, с"] > 0 else None
+    return {name: v.reshape(shape) for name, v in results.items()}, rows
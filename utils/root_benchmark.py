@@ -0,0 +1,129 @@
+"""Сравнение методов scipy.optimize.root на системе из задания 4.2."""
+import time
+
+import numpy as np
+from scipy.optimize import root
+from scipy.sparse.linalg import LinearOperator, splu
+
+from utils.jacobian import SparseJacobian, banded_pattern
+from utils.newton import analytic_jacobian, residual
+
+METHODS = {
+    "hybr": "Метод Пауэлла",
+    "lm": "Метод Левенберга-Марквардта",
+    "krylov": "Метод Крылова",
+    "broyden1": "Метод Бройдена",
+    "anderson": "Метод Андерсона",
+    "df-sane": "Метод DF-SANE",
+}
+
+# Методы, которые хранят плотную матрицу n×n
+DENSE_METHODS = {"hybr", "lm"}
+
+# Ограничения на длительность одного запуска: имя параметра в options и значение.
+# Методы из scipy.optimize.nonlin считают итерации, остальные — вызовы функции.
+# Крылову при n = 100 нужно около 4200 итераций, поэтому лимит с запасом;
+# упёршийся в лимит запуск помечается отдельно от расхождения
+LIMITS = {
+    "hybr": ("maxfev", 20_000),
+    "lm": ("maxiter", 20_000),
+    "df-sane": ("maxfev", 20_000),
+    "krylov": ("maxiter", 5_000),
+    "broyden1": ("maxiter", 5_000),
+    "anderson": ("maxiter", 5_000),
+}
+
+# Запуск считается сошедшимся, только если ‖F(x)‖ меньше порога: lm, например,
+# сообщает success и в локальном минимуме невязки
+TOLERANCE = 1e-6
+
+JACOBIAN_MODES = {
+    "none": "Без якобиана",
+    "analytic": "Аналитический якобиан",
+    "sparsity": "Шаблон разреженности (раскраска столбцов)",
+}
+
+
+def log_sizes(n_min, n_max, count):
+    """Размерности, равномерно распределённые по логарифмической шкале"""
+    return sorted(set(np.geomspace(n_min, n_max, count).round().astype(int).tolist()))
+
+
+def _jacobian_kwargs(method, mode, x0):
+    """Аргументы root() для выбранного способа задания якобиана.
+
+    Возвращает (kwargs, jacobian): jacobian — SparseJacobian, если якобиан
+    считается по шаблону, иначе None. kwargs = None, если метод якобиан
+    не принимает.
+    """
+    if mode == "none":
+        return {}, None
+    sparse_jacobian = None
+    if mode == "analytic":
+        jac = analytic_jacobian
+    else:
+        sparse_jacobian = SparseJacobian(banded_pattern(len(x0)))
+        jac = lambda x: sparse_jacobian(residual, x)
+
+    if method in DENSE_METHODS:
+        return {"jac": lambda x: jac(x).toarray()}, sparse_jacobian
+    if method == "krylov":
+        # Разложение якобиана в начальной точке служит предобуславливателем;
+        # если J(x0) вырождена, Крылов работает без него
+        try:
+            lu = splu(jac(x0).tocsc())
+        except RuntimeError:
+            return {}, sparse_jacobian
+        M = LinearOperator((len(x0), len(x0)), lu.solve)
+        return {"options": {"jac_options": {"inner_M": M}}}, sparse_jacobian
+    return None, None
+
+
+def run_benchmark(methods, sizes, jacobian_mode="none", x0_value=0.0, dense_limit=2000, progress=None,
+                  tolerance=TOLERANCE):
+    """Решает систему каждым методом для каждого n из x0 = x0_value.
+
+    Плотные методы пропускаются при n > dense_limit, длительность каждого
+    запуска ограничена LIMITS. Сошедшимся считается запуск с sol.success
+    и ‖F(x)‖ < tolerance. Возвращает список строк таблицы;
+    progress получает долю выполненных запусков.
+    """
+    rows = []
+    total = len(methods) * len(sizes)
+    for k, (n, method) in enumerate((n, m) for n in sizes for m in methods):
+        row = {"Метод": method, "n": n, "Якобиан": JACOBIAN_MODES[jacobian_mode]}
+        if method in DENSE_METHODS and n > dense_limit:
+            row["Статус"] = f"пропущен: плотный метод при n > {dense_limit}"
+        else:
+            x0 = np.full(n, float(x0_value))
+            start = time.perf_counter()
+            kwargs, sparse_jacobian = _jacobian_kwargs(method, jacobian_mode, x0)
+            note = "" if kwargs is not None else " (якобиан методом не используется)"
+            kwargs = kwargs or {}
+            option, limit = LIMITS[method]
+            kwargs.setdefault("options", {})[option] = limit
+            sol = root(residual, x0, method=method, **kwargs)
+            # nonlin-методы возвращают число итераций, остальные — вызовов функции
+            used = sol.get("nit", sol.get("nfev")) or 0
+            residual_norm = float(np.linalg.norm(sol.fun))
+            if sol.success and residual_norm < tolerance:
+                status = "сошёлся"
+            elif sol.success:
+                status = f"локальный минимум: ‖F‖ = {residual_norm:.2e}"
+            elif used >= limit:
+                status = f"достигнут лимит {option} = {limit:,}"
+            else:
+                status = f"не сошёлся: {sol.message}"
+            row.update({
+                "Время, с": time.perf_counter() - start,
+                "nfev": sol.get("nfev"),
+                "njev": sol.get("njev"),
+                "F в якобиане": sparse_jacobian.evaluations if sparse_jacobian else None,
+                "Невязка": residual_norm,
+                "Погрешность": float(np.linalg.norm(sol.x - 1)),
+                "Статус": status + note,
+            })
+        rows.append(row)
+        if progress is not None:
+            progress((k + 1) / total)
+    return rows
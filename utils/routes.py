@@ -0,0 +1,334 @@
+"""Загрузка и предобработка маршрутов мусороуборочных машин."""
+import csv
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+DATASET_PATH = "dataset/solid-waste-and-recycling-collection-routes-1.csv"
+
+# Версия конвейера предобработки. Увеличивается при любом изменении логики,
+# чтобы закэшированные результаты старой версии не переиспользовались.
+PIPELINE_VERSION = 3
+
+# Уровни детализации для отрисовки: название -> допуск упрощения (в градусах)
+LOD_TOLERANCES = {
+    "Полная": 0.0,
+    "Высокая": 1e-5,
+    "Средняя": 1e-4,
+    "Низкая": 5e-4,
+}
+
+# Размер порции при потоковом чтении CSV (строк)
+CHUNK_SIZE = 20_000
+
+# Поле geo_shape содержит огромные JSON-строки
+csv.field_size_limit(10_000_000)
+
+
+def source_key(path):
+    """Ключ источника данных: абсолютный путь и время изменения файла"""
+    path = os.path.abspath(path)
+    return path, os.stat(path).st_mtime_ns
+
+
+def decode_geometries(values):
+    """Векторный разбор колонки GeoJSON-строк в массив геометрий.
+
+    Вся колонка разбирается одним вызовом GEOS. Возвращает массив геометрий
+    и позиции строк, которые не удалось разобрать (пустые значения
+    ошибками не считаются и дают None).
+    """
+    values = pd.Series(values, dtype=object)
+    present = values.notna().to_numpy()
+    raw = values.where(present, None).to_numpy()
+    geometries = shapely.from_geojson(raw, on_invalid="ignore")
+    bad = np.flatnonzero(present & shapely.is_missing(geometries))
+    return geometries, bad
+
+
+def preprocess_routes(df):
+    """Превращает сырую таблицу маршрутов в готовый к запросам GeoDataFrame.
+
+    Номера строк с некорректной геометрией сохраняются в
+    gdf.attrs["bad_geometry_rows"].
+    """
+    if "geo_shape" not in df.columns:
+        raise ValueError("В файле отсутствует колонка 'geo_shape'. Проверь формат CSV.")
+
+    # Удаляем строки с пустой геометрией
+    df = df.dropna(subset=["geo_shape"])
+    geometries, bad = decode_geometries(df["geo_shape"])
+    bad_rows = df.index[bad].tolist()
+
+    # Исходные JSON-строки после разбора не нужны и занимают больше всего памяти
+    df = df.drop(columns="geo_shape")
+    gdf = gpd.GeoDataFrame(df, geometry=geometries, crs="EPSG:4326").dropna(subset=["geometry"])
+    gdf = gdf.reset_index(drop=True)
+    gdf.attrs["bad_geometry_rows"] = bad_rows
+    return gdf
+
+
+def ingest_routes_csv(path, chunksize=CHUNK_SIZE, columns=None, days=None, progress=None):
+    """Потоковое чтение CSV маршрутов с ограниченным потреблением памяти.
+
+    Файл читается порциями по chunksize строк; в каждой порции сразу
+    разбирается геометрия и отбрасываются JSON-строки, пустые геометрии
+    и ненужные дни. В памяти одновременно находятся только одна сырая
+    порция и уже разобранная геометрия.
+
+    columns — какие колонки оставить (geo_shape добавляется сама),
+    days — какие дни недели оставить, progress — функция, получающая
+    долю прочитанного файла от 0 до 1.
+    """
+    header = pd.read_csv(path, sep=";", nrows=0).columns
+    if "geo_shape" not in header:
+        raise ValueError("В файле отсутствует колонка 'geo_shape'. Проверь формат CSV.")
+    keep = None if columns is None else set(columns) | {"geo_shape"} | ({"day"} if days is not None else set())
+    usecols = None if keep is None else [c for c in header if c in keep]
+
+    total = os.path.getsize(path) or 1
+    pieces, bad_rows = [], []
+    with open(path, "rb") as f:
+        for chunk in pd.read_csv(f, sep=";", usecols=usecols, chunksize=chunksize):
+            if days is not None:
+                chunk = chunk[chunk["day"].isin(days)]
+            piece = preprocess_routes(chunk)
+            bad_rows.extend(piece.attrs["bad_geometry_rows"])
+            pieces.append(piece)
+            if progress is not None:
+                progress(min(f.tell() / total, 1.0))
+
+    if pieces:
+        gdf = pd.concat(pieces, ignore_index=True)
+    else:
+        gdf = preprocess_routes(pd.DataFrame(columns=usecols or header))
+    gdf.attrs["bad_geometry_rows"] = bad_rows
+    return gdf
+
+
+def sidecar_path(path):
+    """Путь к GeoParquet-копии, лежащей рядом с CSV"""
+    return os.path.splitext(path)[0] + ".parquet"
+
+
+def _manifest_path(path):
+    return sidecar_path(path) + ".json"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(path):
+    try:
+        with open(_manifest_path(path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(path, manifest):
+    with open(_manifest_path(path) + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(_manifest_path(path) + ".tmp", _manifest_path(path))
+
+
+def sidecar_is_fresh(path):
+    """Проверяет, соответствует ли GeoParquet-копия текущему CSV.
+
+    Сначала сравниваются размер и время изменения; хэш содержимого
+    считается, только если они разошлись (например, файл скопировали).
+    При совпадении хэша новое время изменения записывается в манифест,
+    чтобы следующая проверка обошлась без хэша.
+    """
+    manifest = _read_manifest(path)
+    if manifest is None or manifest.get("version") != PIPELINE_VERSION:
+        return False
+    if not os.path.exists(sidecar_path(path)):
+        return False
+    stat = os.stat(path)
+    if manifest["size"] != stat.st_size:
+        return False
+    if manifest["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if manifest["sha256"] != file_sha256(path):
+        return False
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _write_manifest(path, manifest)
+    except OSError:
+        pass
+    return True
+
+
+def build_sidecar(path, progress=None, chunksize=CHUNK_SIZE):
+    """Конвертирует CSV в GeoParquet (геометрия в WKB) и пишет манифест"""
+    stat = os.stat(path)
+    gdf = ingest_routes_csv(path, chunksize, progress=progress)
+    target = sidecar_path(path)
+
+    # Пишем во временные файлы и атомарно подменяем: манифест — последним,
+    # чтобы прерванная сборка не выглядела как актуальная
+    gdf.to_parquet(target + ".tmp", index=False, geometry_encoding="WKB")
+    os.replace(target + ".tmp", target)
+    manifest = {
+        "version": PIPELINE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path),
+        "bad_geometry_rows": gdf.attrs["bad_geometry_rows"],
+    }
+    _write_manifest(path, manifest)
+    return gdf
+
+
+def load_routes(path, mtime=None, version=PIPELINE_VERSION, progress=None):
+    """Загружает маршруты из GeoParquet-копии, пересобирая её при необходимости.
+
+    Аргументы mtime и version не используются в теле функции — они входят
+    в ключ кэша, чтобы изменение файла или конвейера сбрасывало кэш.
+    progress получает долю прочитанного CSV, если копию приходится пересобирать.
+    """
+    if sidecar_is_fresh(path):
+        gdf = gpd.read_parquet(sidecar_path(path))
+        gdf.attrs["bad_geometry_rows"] = _read_manifest(path).get("bad_geometry_rows", [])
+        return gdf
+    return build_sidecar(path, progress)
+
+
+@dataclass(frozen=True)
+class DayPartition:
+    """Заранее посчитанные данные маршрутов одного дня"""
+    positions: np.ndarray  # позиции строк в GeoDataFrame
+    center: tuple  # (широта, долгота) центра карты
+    bounds: tuple  # (minx, miny, maxx, maxy)
+    count: int
+    mean_square_miles: float
+    total_square_miles: float
+
+
+def build_day_index(gdf):
+    """Разбивает маршруты по дням недели за один проход.
+
+    Центроиды и границы считаются векторно для всех маршрутов сразу,
+    после чего выбор дня сводится к поиску в словаре.
+    """
+    geometries = gdf.geometry.to_numpy()
+    centroids = shapely.centroid(geometries)
+    cx, cy = shapely.get_x(centroids), shapely.get_y(centroids)
+    bounds = shapely.bounds(geometries)
+    square_miles = gdf["square_miles"].to_numpy(dtype=float)
+
+    index = {}
+    for day, positions in sorted(gdf.groupby("day").indices.items()):
+        area = square_miles[positions]
+        area = area[~np.isnan(area)]
+        index[day] = DayPartition(
+            positions=positions,
+            center=(float(cy[positions].mean()), float(cx[positions].mean())),
+            bounds=(
+                float(bounds[positions, 0].min()),
+                float(bounds[positions, 1].min()),
+                float(bounds[positions, 2].max()),
+                float(bounds[positions, 3].max()),
+            ),
+            count=len(positions),
+            mean_square_miles=float(area.mean()) if len(area) else float("nan"),
+            total_square_miles=float(area.sum()),
+        )
+    return index
+
+
+def build_lod_tiers(geometries, tolerances=LOD_TOLERANCES):
+    """Упрощённые копии геометрии для каждого уровня детализации.
+
+    Упрощение сохраняет топологию каждого полигона (без самопересечений
+    и схлопнутых колец). Массивы выровнены с позициями строк GeoDataFrame.
+    """
+    geometries = np.asarray(geometries)
+    tiers = {}
+    for name, tolerance in tolerances.items():
+        if tolerance == 0:
+            tiers[name] = geometries
+        else:
+            tiers[name] = shapely.simplify(geometries, tolerance, preserve_topology=True)
+    return tiers
+
+
+def tier_for_zoom(zoom, tolerances=LOD_TOLERANCES):
+    """Самый грубый уровень, допуск которого не превышает размер пикселя на данном масштабе"""
+    pixel_degrees = 360 / (256 * 2 ** zoom)
+    suitable = {name: tol for name, tol in tolerances.items() if tol <= pixel_degrees}
+    if not suitable:
+        return min(tolerances, key=tolerances.get)
+    return max(suitable, key=suitable.get)
+
+
+def vertex_count(geometries):
+    return int(shapely.get_num_coordinates(geometries).sum())
+
+
+def routes_geojson(gdf, positions, geometries):
+    """GeoJSON выбранных маршрутов с геометрией выбранного уровня детализации"""
+    return gdf.iloc[positions].assign(geometry=geometries[positions]).__geo_interface__
+
+
+def payload_bytes(geojson):
+    """Примерный объём данных, уходящих в браузер"""
+    return len(json.dumps(geojson, separators=(",", ":")))
+
+
+def build_spatial_index(geometries):
+    return shapely.STRtree(geometries)
+
+
+def lookup_points(tree, gdf, lat, lon):
+    """Маршруты, обслуживающие каждую из точек.
+
+    Все точки проверяются одним запросом к STR-дереву: сначала отбор по
+    ограничивающим прямоугольникам, затем точная проверка пересечения.
+    Возвращает таблицу пар (точка, маршрут); точки вне маршрутов в неё не попадают.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    point_idx, route_idx = tree.query(shapely.points(lon, lat), predicate="intersects")
+
+    attributes = pd.DataFrame(gdf.drop(columns=gdf.geometry.name))
+    matches = attributes.iloc[route_idx].reset_index(drop=True)
+    matches.insert(0, "route_position", route_idx)
+    matches.insert(0, "lon", lon[point_idx])
+    matches.insert(0, "lat", lat[point_idx])
+    matches.insert(0, "point", point_idx)
+    return matches
+
+
+def query_bbox(tree, bounds):
+    """Позиции маршрутов, пересекающих прямоугольник (minx, miny, maxx, maxy)"""
+    return np.sort(tree.query(shapely.box(*bounds), predicate="intersects"))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Сборка GeoParquet-копии датасета маршрутов")
+    parser.add_argument("path", nargs="?", default=DATASET_PATH)
+    parser.add_argument("--force", action="store_true", help="пересобрать даже актуальную копию")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE, help="строк в одной порции")
+    args = parser.parse_args()
+
+    if args.force or not sidecar_is_fresh(args.path):
+        build_sidecar(args.path, lambda done: print(f"\r{done:.0%}", end="", flush=True), args.chunksize)
+        print()
+        print(f"Собрано: {sidecar_path(args.path)}")
+    else:
+        print(f"Копия актуальна: {sidecar_path(args.path)}")
@@ -0,0 +1,142 @@
+"""Потоковая фильтрация длинных сигналов.
+
+Сигнал читается из файла через memmap и обрабатывается блоками, поэтому
+память не зависит от длины сигнала. Фильтр задаётся секциями второго
+порядка (SOS): они устойчивы к округлению при высоких порядках, в отличие
+от передаточной функции (b, a).
+"""
+import time
+
+import numpy as np
+from scipy import signal
+
+CHUNK_SIZE = 1 << 20
+
+# Форматы сырых файлов без заголовка
+RAW_DTYPES = {"float32": np.float32, "float64": np.float64, "int16": np.int16}
+
+
+def design_filter(order=4, cutoff=0.1, btype="low"):
+    """Фильтр Баттерворта в виде SOS; cutoff — доля частоты Найквиста"""
+    return signal.butter(order, cutoff, btype=btype, output="sos")
+
+
+def open_signal(path, dtype=None):
+    """Одномерный сигнал из файла без чтения в память.
+
+    .npy открывается через np.load(mmap_mode="r"), остальные файлы
+    считаются сырыми отсчётами типа dtype.
+    """
+    if str(path).endswith(".npy"):
+        x = np.load(path, mmap_mode="r")
+    else:
+        x = np.memmap(path, dtype=RAW_DTYPES[dtype or "float32"], mode="r")
+    if x.ndim != 1:
+        raise ValueError(f"Ожидается одномерный сигнал, получен массив формы {x.shape}")
+    if len(x) == 0:
+        raise ValueError("Файл не содержит отсчётов")
+    return x
+
+
+def synthetic_signal(path, n, freq=5.0, fs=500.0, noise=0.3, seed=0, chunk_size=CHUNK_SIZE):
+    """Записывает в .npy синусоиду с частотой freq и гауссовым шумом.
+
+    Как в демонстрации на странице: fs отсчётов в секунду. Генерируется
+    блоками, файл открывается как memmap.
+    """
+    rng = np.random.default_rng(seed)
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n,))
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        t = np.arange(start, stop) / fs
+        out[start:stop] = np.sin(2 * np.pi * freq * t) + noise * rng.standard_normal(stop - start)
+    out.flush()
+    del out
+    return open_signal(path)
+
+
+def settling_length(sos, tol=1e-8, max_length=1 << 20):
+    """Число отсчётов, за которое импульсная характеристика затухает до tol от максимума.
+
+    Столько отсчётов перекрытия нужно соседним блокам при нулевой фазе,
+    чтобы переходный процесс на краях блока не попадал в результат.
+    """
+    length = 1024
+    while True:
+        impulse = np.zeros(length)
+        impulse[0] = 1
+        h = np.abs(signal.sosfilt(sos, impulse))
+        above = np.flatnonzero(h > tol * h.max())
+        last = above[-1] + 1 if above.size else 1
+        if last < length // 2 or length >= max_length:
+            return int(last)
+        length *= 2
+
+
+def _default_padlen(sos):
+    # Длина отражённого продолжения, которую sosfiltfilt использует по умолчанию
+    return 3 * (2 * len(sos) + 1 - min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum()))
+
+
+def sosfilt_chunks(sos, x, chunk_size=CHUNK_SIZE):
+    """Причинная фильтрация по блокам с переносом состояния фильтра.
+
+    Результат совпадает с sosfilt(sos, x, zi=sosfilt_zi(sos) * x[0])
+    для всего сигнала. Выдаёт пары (start, y).
+    """
+    zi = signal.sosfilt_zi(sos) * float(x[0])
+    for start in range(0, len(x), chunk_size):
+        chunk = np.asarray(x[start:start + chunk_size], dtype=np.float64)
+        y, zi = signal.sosfilt(sos, chunk, zi=zi)
+        yield start, y
+
+
+def sosfiltfilt_chunks(sos, x, chunk_size=CHUNK_SIZE, overlap=None):
+    """Фильтрация с нулевой фазой по блокам с перекрытием.
+
+    Каждый блок расширяется на overlap отсчётов с обеих сторон, обрабатывается
+    sosfiltfilt, и в результат идёт только исходная часть. На краях всего
+    сигнала поведение совпадает с sosfiltfilt; внутри расхождение определяется
+    затуханием импульсной характеристики за overlap отсчётов. Блок не
+    короче перекрытия, иначе каждый отсчёт фильтровался бы много раз.
+    """
+    if overlap is None:
+        overlap = settling_length(sos)
+    overlap = max(overlap, _default_padlen(sos))
+    chunk_size = max(chunk_size, overlap)
+    n = len(x)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        lo, hi = max(0, start - overlap), min(n, stop + overlap)
+        segment = np.asarray(x[lo:hi], dtype=np.float64)
+        y = signal.sosfiltfilt(sos, segment, padlen=min(_default_padlen(sos), len(segment) - 1))
+        yield start, y[start - lo:stop - lo]
+
+
+def filter_to_file(sos, x, out_path, chunk_size=CHUNK_SIZE, zero_phase=False, overlap=None, progress=None):
+    """Фильтрует сигнал x по блокам и пишет результат в .npy (float32).
+
+    Возвращает (y, stats): y — memmap результата, stats — длина сигнала,
+    время и пропускная способность в отсчётах в секунду.
+    progress получает долю обработанных отсчётов.
+    """
+    n = len(x)
+    if zero_phase and overlap is not None:
+        chunk_size = max(chunk_size, overlap)
+    y = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=(n,))
+    chunks = (sosfiltfilt_chunks(sos, x, chunk_size, overlap) if zero_phase
+              else sosfilt_chunks(sos, x, chunk_size))
+    start_time = time.perf_counter()
+    for start, part in chunks:
+        y[start:start + len(part)] = part
+        if progress is not None:
+            progress((start + len(part)) / n)
+    y.flush()
+    elapsed = time.perf_counter() - start_time
+    stats = {
+        "Отсчётов": n,
+        "Блок": chunk_size,
+        "Время, с": elapsed,
+        "Отсчётов в секунду": n / elapsed if elapsed > 0 else float("inf"),
+    }
+    return y, stats
@@ -0,0 +1,96 @@
+"""Кэш решений систем с продолжением по размерности."""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SolveCache:
+    """LRU-кэш результатов решения с ограничением по числу записей и памяти.
+
+    Ключ — (система, n, метод, точность). Значение — кортеж, который вернул
+    решатель: (x, iterations, norms, ...). Массивы хранятся только для чтения,
+    чтобы решатели, меняющие x на месте, не портили кэш.
+    """
+
+    def __init__(self, max_entries=64, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def stats(self):
+        return {"Записей": len(self._data), "Байт": self._bytes, "Попаданий": self.hits, "Промахов": self.misses}
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key, result):
+        x = result[0]
+        if x is not None:
+            x = np.array(x, copy=True)
+            x.flags.writeable = False
+        result = (x, *result[1:])
+        size = (x.nbytes if x is not None else 0) + 8 * len(result[2])
+
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes.pop(key)
+                del self._data[key]
+            self._data[key] = result
+            self._sizes[key] = size
+            self._bytes += size
+            # Вытесняем самые давно использованные записи
+            while len(self._data) > 1 and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                old_key, _ = self._data.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+
+    def nearest(self, system, n, method=None):
+        """Ближайшее по n (в логарифмическом масштабе) успешное решение той же системы.
+
+        Если method задан, сначала ищется среди решений этим методом.
+        Возвращает (n, x) или None.
+        """
+        with self._lock:
+            candidates = [
+                (key, value[0]) for key, value in self._data.items()
+                if key[0] == system and key[1] != n and value[0] is not None
+            ]
+        if method is not None and any(key[2] == method for key, _ in candidates):
+            candidates = [(key, x) for key, x in candidates if key[2] == method]
+        if not candidates:
+            return None
+        key, x = min(candidates, key=lambda item: abs(np.log(item[0][1] / n)))
+        return key[1], x
+
+
+def continue_guess(x, n, how="interpolate"):
+    """Начальное приближение размерности n из решения другой размерности.
+
+    how="interpolate" — линейная интерполяция по относительному номеру
+    компоненты; how="extend" — решение обрезается или дополняется
+    последним значением.
+    """
+    x = np.asarray(x, dtype=float)
+    if how == "interpolate":
+        return np.interp(np.linspace(0, 1, n), np.linspace(0, 1, len(x)), x)
+    if n <= len(x):
+        return x[:n].copy()
+    return np.concatenate([x, np.full(n - len(x), x[-1])])
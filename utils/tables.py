@@ -0,0 +1,150 @@
+"""Большие таблицы: компактное хранение столбцов и отсортированный индекс.
+
+Числовые столбцы приводятся к наименьшему подходящему типу, строки хранятся
+категориями или в Arrow. Для столбца фильтра один раз строится перестановка,
+упорядочивающая его значения: запрос «больше порога» решается двоичным
+поиском и возвращает срез перестановки без копирования строк.
+"""
+import numpy as np
+import pandas as pd
+
+CSV_CHUNK_ROWS = 1_000_000
+
+# Строковый столбец становится категорией, если различных значений не больше этой доли
+CATEGORY_RATIO = 0.5
+
+OPERATORS = (">", "≥", "<", "≤")
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def compact(df):
+    """Таблица с уменьшенными типами столбцов.
+
+    Целые — до int8/16/32, вещественные — до float32, строки — в category
+    при небольшом числе различных значений, иначе в string[pyarrow].
+    """
+    out = {}
+    for name, column in df.items():
+        if pd.api.types.is_bool_dtype(column) or isinstance(column.dtype, pd.CategoricalDtype):
+            out[name] = column
+        elif pd.api.types.is_integer_dtype(column):
+            out[name] = pd.to_numeric(column, downcast="integer")
+        elif pd.api.types.is_float_dtype(column):
+            out[name] = pd.to_numeric(column, downcast="float")
+        elif pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column):
+            if column.nunique(dropna=True) <= CATEGORY_RATIO * max(len(column), 1):
+                out[name] = column.astype("category")
+            else:
+                out[name] = column.astype("string[pyarrow]")
+        else:
+            out[name] = column
+    return pd.DataFrame(out, index=df.index)
+
+
+def read_table(path):
+    """Читает CSV блоками по CSV_CHUNK_ROWS строк, сжимая каждый блок, или Parquet.
+
+    Возвращает (DataFrame, stats) с объёмом в памяти до и после сжатия.
+    """
+    if str(path).endswith(".parquet"):
+        raw = pd.read_parquet(path)
+        before = memory_mb(raw)
+        table = compact(raw)
+        del raw
+    else:
+        parts, before = [], 0.0
+        for chunk in pd.read_csv(path, chunksize=CSV_CHUNK_ROWS):
+            before += memory_mb(chunk)
+            # Категории блоков объединяются после склейки, поэтому строки пока в Arrow
+            chunk = compact(chunk)
+            for name in chunk.select_dtypes("category").columns:
+                chunk[name] = chunk[name].astype("string[pyarrow]")
+            parts.append(chunk)
+        table = compact(pd.concat(parts, ignore_index=True)) if parts else pd.DataFrame()
+    return table, {"Строк": len(table), "Исходно, МБ": before, "После сжатия, МБ": memory_mb(table)}
+
+
+def synthetic_weather(n, seed=0):
+    """Таблица наблюдений в духе примера на странице, сразу в компактных типах"""
+    rng = np.random.default_rng(seed)
+    stations = pd.Categorical.from_codes(rng.integers(0, 100, n, dtype=np.int8),
+                                         [f"Станция {i}" for i in range(100)])
+    return pd.DataFrame({
+        "Станция": stations,
+        "Температура, °C": rng.integers(15, 35, n, dtype=np.int8),
+        "Влажность, %": rng.integers(30, 90, n, dtype=np.int8),
+        "Скорость ветра, м/с": rng.uniform(0.5, 5.0, n).astype(np.float32).round(2),
+    })
+
+
+class SortedIndex:
+    """Перестановка строк, упорядочивающая числовой столбец.
+
+    Пропуски (NaN) уходят в конец и в результаты запросов не попадают.
+    """
+
+    def __init__(self, column):
+        values = column.to_numpy()
+        order = np.argsort(values, kind="stable")
+        self.order = order.astype(np.int32) if len(order) < 2**31 else order
+        self.values = values[self.order]
+        self.valid = len(values) - int(pd.isna(self.values).sum()) if values.dtype.kind == "f" else len(values)
+
+    @property
+    def nbytes(self):
+        return self.order.nbytes + self.values.nbytes
+
+    def position(self, threshold, side="left"):
+        """Число значений меньше порога (side="left") или не больше (side="right").
+
+        Порог приводится к типу столбца так, чтобы результат был точным:
+        иначе searchsorted привёл бы к общему типу весь столбец.
+        """
+        values = self.values[:self.valid]
+        kind = values.dtype.kind
+        if kind in "iu":
+            info = np.iinfo(values.dtype)
+            if threshold < info.min:
+                return 0
+            if threshold > info.max:
+                return self.valid
+            if threshold != int(threshold):
+                # Для целых «< 30.5» и «≤ 30.5» — это «< 31»
+                return int(np.searchsorted(values, values.dtype.type(np.ceil(threshold)), side="left"))
+            return int(np.searchsorted(values, values.dtype.type(threshold), side=side))
+        if kind == "f":
+            with np.errstate(over="ignore"):
+                same = values.dtype.type(threshold)
+            # Сравнение в float64: np.float32 == float сравнивал бы в float32
+            if float(same) == float(threshold):
+                return int(np.searchsorted(values, same, side=side))
+            # Порог не представим в типе столбца: ближайшее меньшее представимое
+            # значение даёт одинаковый ответ для обеих сторон
+            below = same if float(same) < float(threshold) else np.nextafter(same, values.dtype.type(-np.inf))
+            return int(np.searchsorted(values, below, side="right"))
+        return int(np.searchsorted(values, threshold, side=side))
+
+    def query(self, op, threshold):
+        """Номера строк, удовлетворяющих условию «значение op threshold».
+
+        Возвращает срез перестановки (без копирования) в порядке возрастания значения.
+        """
+        if op == ">":
+            return self.order[self.position(threshold, "right"):self.valid]
+        if op == "≥":
+            return self.order[self.position(threshold, "left"):self.valid]
+        if op == "<":
+            return self.order[:self.position(threshold, "left")]
+        if op == "≤":
+            return self.order[:self.position(threshold, "right")]
+        raise ValueError(f"Неизвестная операция: {op}")
+
+
+def page(table, positions, number, size, descending=False):
+    """Строки страницы number (с единицы) из результата запроса"""
+    if descending:
+        positions = positions[::-1]
+    return table.iloc[positions[(number - 1) * size:number * size]]